@@ -1,13 +1,42 @@
+import asyncio
+import aiohttp
 import requests
 import sys
 import os
-import json
 import random
+import argparse
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from history_cache import get_history_cache
+from similarity_index import get_similarity_index, SiblingSet, SIMILARITY_THRESHOLD
+from prompt_templates import compile_prompt, get_recent_openings, system_message, PROMPT_MODE
+from sarvam_client import (
+    post_chat_completion, async_post_chat_completion, stream_chat_completion, async_stream_chat_completion,
+    SARVAM_POOL_SIZE, SARVAM_MAX_RETRIES
+)
+from metrics import PROMPT_BUILD_SECONDS, POSTPROCESS_SECONDS, RULE_VIOLATIONS, REPAIRED_COMPLETIONS
+from review_rules import find_violations, repair_review
+from rate_limiter import RateLimitExceeded, SARVAM_REQUESTS_PER_SECOND, SARVAM_TOKENS_PER_MINUTE
 
 # Sarvam AI API Configuration
 # IMPORTANT: You MUST set a valid API key to use this script
 API_KEY = os.getenv("SARVAM_API_KEY", "")  # Fetch from environment variable
-API_ENDPOINT = "https://api.sarvam.ai/v1/chat/completions"
+API_ENDPOINT = os.getenv("SARVAM_API_ENDPOINT", "https://api.sarvam.ai/v1/chat/completions")
+
+# Concurrent upstream calls per generate_batch() call
+BATCH_CONCURRENCY = int(os.getenv("SARVAM_BATCH_CONCURRENCY", "8"))
+
+# Upstream calls per review before a near-duplicate is accepted anyway
+SIMILARITY_MAX_ATTEMPTS = int(os.getenv("SIMILARITY_MAX_ATTEMPTS", "3"))
+
+# Completions requested per Sarvam call ("n"); the best one is kept (1 = off)
+REVIEW_CANDIDATES = max(1, int(os.getenv("REVIEW_CANDIDATES", "1")))
+
+# Rough characters per completion token, used to size max_tokens from the length range.
+# Romanized Hindi/Gujarati splits into more tokens than English.
+CHARS_PER_TOKEN = {"English": 4.0}
+DEFAULT_CHARS_PER_TOKEN = 3.0
 
 # TO GET A VALID API KEY:
 # 1. Sign up at: https://dashboard.sarvam.ai/
@@ -17,37 +46,75 @@ API_ENDPOINT = "https://api.sarvam.ai/v1/chat/completions"
 # API_KEY = "your-api-key-here"
 
 
+class MissingAPIKeyError(RuntimeError):
+    """Raised when SARVAM_API_KEY is missing or obviously invalid"""
+
+
+def print_api_key_help():
+    """Explain how to configure the Sarvam AI API key"""
+    print("\n" + "=" * 70)
+    print("                      ⚠️  ERROR: NO API KEY")
+    print("=" * 70)
+    print("\n❌ Sarvam AI API key is required to generate reviews!")
+    print("\n🔑 TO GET YOUR API KEY:")
+    print("  1. Sign up at: https://dashboard.sarvam.ai/")
+    print("  2. Generate your API key from the dashboard")
+    print("  3. Set it as environment variable:")
+    print("=" * 70 + "\n")
+
+
+def max_tokens_for(max_chars, language="English"):
+    """Completion token budget for a review of up to max_chars characters, with headroom"""
+    chars_per_token = CHARS_PER_TOKEN.get(language, DEFAULT_CHARS_PER_TOKEN)
+    return int(max_chars / chars_per_token * 1.3) + 16
+
+
+def chat_payload(prompt, compact=False, max_tokens=100, n=1):
+    """Sarvam chat-completions body with the system message for the prompt mode"""
+    payload = {
+        "model": "sarvam-m",
+        "messages": [
+            {
+                "role": "system",
+                "content": system_message(compact)
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ],
+        "temperature": 0.8,
+        "max_tokens": max_tokens,
+        "frequency_penalty": 0.5,
+        "presence_penalty": 0.3
+    }
+    if n > 1:
+        payload["n"] = n
+    return payload
+
+
+def review_payload(prompt, compact, max_chars, language, n=1):
+    """chat_payload() with the completion budget generate_review() uses for the length range"""
+    return chat_payload(prompt, compact, max_tokens_for(max_chars, language), n)
+
+
 class ReviewGenerator:
     """Advanced AI Review Generator with structured prompt system"""
     
     def __init__(self):
+        # One instance is shared by all request threads (see get_review_generator);
+        # it only holds references to the process-wide, lock-protected indexes
         self.api_key = API_KEY
         self.api_endpoint = API_ENDPOINT
-        self.reviews_file = "reviews_history.json"
-        self.existing_reviews = self.load_existing_reviews()
+        self.history = get_history_cache()
+        self.similarity = get_similarity_index(self.history)
+        self.openings = get_recent_openings(self.history)
+        self.compact_prompts = PROMPT_MODE == "compact"
+        self.candidates = REVIEW_CANDIDATES
         
         # Check if API key is configured
         if not API_KEY or len(API_KEY) < 10:
-            print("\n" + "=" * 70)
-            print("                      ⚠️  ERROR: NO API KEY")
-            print("=" * 70)
-            print("\n❌ Sarvam AI API key is required to generate reviews!")
-            print("\n🔑 TO GET YOUR API KEY:")
-            print("  1. Sign up at: https://dashboard.sarvam.ai/")
-            print("  2. Generate your API key from the dashboard")
-            print("  3. Set it as environment variable:")
-            print("=" * 70 + "\n")
-            sys.exit(1)
-    
-    def load_existing_reviews(self):
-        """Load existing reviews from JSON file"""
-        try:
-            if os.path.exists(self.reviews_file):
-                with open(self.reviews_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return []
-        except Exception:
-            return []
+            raise MissingAPIKeyError("SARVAM_API_KEY is not set")
     
     def get_unique_length_range(self):
         """Generate random, unique character length ranges for variety"""
@@ -61,6 +128,12 @@ class ReviewGenerator:
         ]
         return random.choice(length_options)
     
+    def choose_length_range(self, min_chars=None, max_chars=None):
+        """The caller's length range, or a random one from get_unique_length_range()"""
+        if min_chars is None or max_chars is None:
+            return self.get_unique_length_range()
+        return min_chars, max_chars
+    
     def get_unique_structure(self):
         """Generate unique sentence structure hints"""
         structures = [
@@ -73,227 +146,358 @@ class ReviewGenerator:
         ]
         return random.choice(structures)
     
-    def check_similarity(self, new_review_text):
-        """Check if review is too similar to existing ones"""
-        if not self.existing_reviews:
-            return False
-        
-        # Get last 10 reviews for comparison
-        recent_reviews = self.existing_reviews[-10:] if len(self.existing_reviews) > 10 else self.existing_reviews
-        
-        for review in recent_reviews:
-            existing_text = review.get('review', '')
-            # Check first 50 characters similarity
-            if existing_text[:50].lower() == new_review_text[:50].lower():
-                return True
-        return False
-        
-    def build_prompt(self, business_name, business_type, category, star_rating, language, use_case="Customer review", min_chars=200, max_chars=350):
+    def build_prompt(self, business_name, business_type, category, star_rating, language, use_case="Customer review", min_chars=None, max_chars=None, compact=None):
         """
-        Build a structured prompt based on your specifications
+        Build a structured prompt based on your specifications.
+        Static text comes precompiled from prompt_templates; only the dynamic parts are spliced in.
+        Without min_chars/max_chars a random length range is used.
+        compact=True uses the condensed instruction set (default: PROMPT_MODE).
         """
+        if compact is None:
+            compact = self.compact_prompts
         
-        # Determine sentiment based on star rating
-        sentiment_map = {
-            1: "Soft tone, gentle issues, polite feedback about problems. Disappointed but respectful.",
-            2: "Mostly positive with mild suggestions. Some concerns but hopeful tone.",
-            3: "Balanced and fair. Mix of pros and cons. Neutral perspective.",
-            4: "Positive with a small suggestion for improvement. Satisfied overall.",
-            5: "Warm, detailed, fully satisfied. Enthusiastic about the experience."
-        }
-        
-        sentiment = sentiment_map.get(star_rating, sentiment_map[3])
-        
-        # Get unique structure and length
-        unique_structure = self.get_unique_structure()
-        min_chars, max_chars = self.get_unique_length_range()
-        
-        # Get recent review openings to avoid
-        recent_openings = []
-        if len(self.existing_reviews) > 0:
-            recent = self.existing_reviews[-5:] if len(self.existing_reviews) >= 5 else self.existing_reviews
-            for rev in recent:
-                text = rev.get('review', '')
-                if text:
-                    recent_openings.append(text[:30])
-        
-        avoid_openings = "\n".join([f"  * Don't start like: '{opening}...'" for opening in recent_openings])
+        with PROMPT_BUILD_SECONDS.time():
+            # Get unique structure and length
+            unique_structure = self.get_unique_structure()
+            min_chars, max_chars = self.choose_length_range(min_chars, max_chars)
+            
+            return compile_prompt(language, use_case, star_rating, compact).render(
+                business_type=business_type,
+                business_name=business_name,
+                category=category,
+                unique_structure=unique_structure,
+                avoid_openings=self.openings.avoid_lines(compact),
+                min_chars=min_chars,
+                max_chars=max_chars
+            )
+    
+    def build_payload(self, prompt, max_chars, language, n=1, compact=None):
+        """Chat-completions request body for a prompt (see review_payload)"""
+        if compact is None:
+            compact = self.compact_prompts
+        return review_payload(prompt, compact, max_chars, language, n)
+    
+    @staticmethod
+    def clean_review_text(review_text, min_chars, max_chars):
+        """Strip wrapping quotes and trim the review to max_chars at a sentence end"""
+        review_text = review_text.strip()
         
-        # Language-specific instructions
-        language_instruction = ""
-        if language.lower() == "english":
-            language_instruction = """Write the entire review in English only.
-VOCABULARY RULES:
-- Use SIMPLE, EVERYDAY words that anyone can understand
-- Avoid complex or fancy words like: "exceptional", "meticulous", "remarkable", "professionalism", "precision"
-- Use easy words like: good, great, nice, happy, helpful, friendly, clean, quick, easy, caring
-- Write like a normal person talks, not like a professional writer
-- Keep sentences short and simple
-Example good words: loved, enjoyed, felt comfortable, took care, listened well, explained clearly"""
-        elif language.lower() in ["gujarati", "gujarati romanized"]:
-            language_instruction = """Write Gujarati using English letters only (Romanized Gujarati).
-GUJARATI GRAMMAR RULES - VERY IMPORTANT:
-- Use correct Gujarati sentence structure: Subject + Object + Verb
-- Correct verb conjugations: 
-  * "hato" (was - masculine), "hati" (was - feminine)
-  * "chu" (am/is), "chhe" (is/are)
-  * "karyu" (did), "kari" (did - feminine)
-  * "rahyo" (stayed - masculine), "rahi" (stayed - feminine)
-- Proper postpositions: "ma" (in), "thi" (from), "ne" (and/to)
-- Natural word order, not English translation
-- Use proper Gujarati expressions and idioms
-- Agreement between gender, number, and verb forms
-Example: "Mare aa jagya-e jaavu bahuj saras rahyu" (My visit to this place was very good)"""
-        elif language.lower() in ["hindi", "hindi romanized"]:
-            language_instruction = """Write Hindi using English letters only (Romanized Hindi).
-HINDI GRAMMAR RULES:
-- Correct verb conjugations with proper gender agreement
-- Use "ne" for past tense subjects correctly
-- Proper sentence structure
-- Natural Hindi expressions
-Example: "Mujhe yahan jane mein bahut achha laga" (I felt very good going here)"""
+        # Remove quotes if AI added them
+        if review_text.startswith('"') and review_text.endswith('"'):
+            review_text = review_text[1:-1]
+        if review_text.startswith("'") and review_text.endswith("'"):
+            review_text = review_text[1:-1]
         
-        # Build the complete prompt
-        prompt = f"""Generate a realistic {use_case.lower()} for a {business_type} called "{business_name}" in the {category} category.
-
-STAR RATING: {star_rating}/5
-SENTIMENT: {sentiment}
-
-UNIQUENESS REQUIREMENTS:
-- STRUCTURE PATTERN: {unique_structure}
-- This review MUST be completely different from previous reviews
-{avoid_openings if avoid_openings else ""}
-- Create a FRESH opening sentence (not used before)
-- Use different vocabulary and phrasing
-- Vary the story and details mentioned
-
-STRICT WRITING RULES:
-- Length: Between {min_chars} and {max_chars} characters
-- Tone: Natural and conversational (like talking to a friend)
-- First sentence must be unique (avoid repetitive openings)
-- No repetition of ideas
-- Mention business name "{business_name}" naturally in the review
-- Include one emotional detail or personal experience
-- Do NOT mention the star rating in the review text
-- Do NOT use these overused phrases:
-  * "Highly recommend"
-  * "I felt safe"
-  * "Amazing experience"
-  * "Best place ever"
-  * "Exceeded expectations"
-  * "Exceeded all my expectations"
-  * "Cannot recommend enough"
-- AVOID fancy/complex words like: exceptional, remarkable, meticulous, professionalism, precision, genuinely, truly, outstanding
-- No exclamation marks
-- No dashes (—) in the text
-- No em dashes or en dashes
-- Use simple periods and commas only for punctuation
-- Write like a real person sharing their experience
-- Vary sentence structure and length
-
-LANGUAGE: {language_instruction}
-
-IMPORTANT:
-- Return ONLY the review text
-- No quotes, no markdown, no formatting
-- No template-like structure
-- Make it sound authentic and unique
-
-Generate the review now:"""
+        # Enforce character limit strictly
+        if len(review_text) > max_chars:
+            # Trim to max_chars and find last complete sentence
+            review_text = review_text[:max_chars]
+            # Find last period, question mark, or other sentence ending
+            last_period = max(review_text.rfind('.'), review_text.rfind('?'), review_text.rfind('।'))
+            if last_period > min_chars:
+                review_text = review_text[:last_period + 1]
+            else:
+                # If no good sentence break, just trim and add period
+                review_text = review_text[:max_chars-1].rsplit(' ', 1)[0] + '.'
         
-        return prompt
+        return review_text
     
-    def generate_review(self, business_name, business_type, category, star_rating, language="English", use_case="Customer review", min_chars=200, max_chars=350):
+    def finalize_review(self, text, business_name, min_chars, max_chars):
         """
-        Generate review using Sarvam AI API with perfect prompt
+        Repair fixable rule breaks (punctuation, dashes, fancy words), trim to
+        max_chars and check the prompt rules again.
+        Returns (review_text, similarity, repaired rules, remaining violations).
         """
+        with POSTPROCESS_SECONDS.time():
+            text, repaired = repair_review(text.strip())
+            review_text = self.clean_review_text(text, min_chars, max_chars)
+            violations = find_violations(review_text, business_name, min_chars, max_chars)
+            similarity, _ = self.similarity.score(review_text)
+        return review_text, similarity, repaired, violations
+    
+    @staticmethod
+    def candidate_rank(candidate, min_chars, max_chars):
+        """
+        Sort key for a finalize_review() result, best first: not a near-duplicate,
+        fewest remaining violations, fewest repairs, least similar to history,
+        closest to the middle of the length range.
+        """
+        review_text, similarity, repaired, violations = candidate
+        return (similarity >= SIMILARITY_THRESHOLD, len(violations), len(repaired),
+                round(similarity, 1), abs(len(review_text) - (min_chars + max_chars) / 2))
+    
+    def read_completion(self, response, token_usage, business_name, min_chars, max_chars):
+        """Best finalize_review() candidate of a 200 chat-completions response, adding up token usage"""
+        result = response.json()
+        for key, value in result.get('usage', {}).items():
+            if isinstance(value, (int, float)):
+                token_usage[key] = token_usage.get(key, 0) + value
         
-        # Build the perfect prompt
-        prompt = self.build_prompt(business_name, business_type, category, star_rating, language, use_case, min_chars, max_chars)
-        
-        headers = {
-            "api-subscription-key": self.api_key,
-            "Content-Type": "application/json"
+        candidates = [self.finalize_review(choice['message']['content'], business_name, min_chars, max_chars)
+                      for choice in result['choices']]
+        return min(candidates, key=lambda candidate: self.candidate_rank(candidate, min_chars, max_chars))
+    
+    def should_regenerate(self, similarity, repaired, violations, attempt):
+        """Regenerate only for near-duplicates and violations repair can't fix; counts the outcome"""
+        regenerate = (similarity >= SIMILARITY_THRESHOLD or bool(violations)) and attempt < SIMILARITY_MAX_ATTEMPTS
+        for rule in repaired:
+            RULE_VIOLATIONS.inc(rule=rule, outcome='repaired')
+        for rule in violations:
+            RULE_VIOLATIONS.inc(rule=rule, outcome='regenerated' if regenerate else 'kept')
+        if repaired and not violations and similarity < SIMILARITY_THRESHOLD:
+            REPAIRED_COMPLETIONS.inc()
+        return regenerate
+    
+    def review_result(self, review_text, token_usage, similarity, attempt, repaired=(), violations=()):
+        return {
+            "success": True,
+            "review": review_text,
+            "char_count": len(review_text),
+            "token_usage": token_usage,
+            "similarity": round(similarity, 3),
+            "attempts": attempt,
+            "repaired": list(repaired),
+            "violations": list(violations),
+            "method": "api"
         }
-        
-        payload = {
-            "model": "sarvam-m",
-            "messages": [
-                {
-                    "role": "system",
-                    "content": "You are an expert at writing authentic, varied, and realistic business reviews. Never repeat patterns or use template language. Each review must be completely unique. Keep reviews concise and within the specified character limit."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            "temperature": 0.8,
-            "max_tokens": 100,
-            "frequency_penalty": 0.5,
-            "presence_penalty": 0.3
+    
+    def error_result(self, error):
+        return {
+            "success": False,
+            "error": error,
+            "review": None
         }
+    
+    def generate_review(self, business_name, business_type, category, star_rating, language="English", use_case="Customer review", min_chars=None, max_chars=None):
+        """
+        Generate review using Sarvam AI API with perfect prompt.
+        Without min_chars/max_chars each attempt asks for a random length range.
+        With REVIEW_CANDIDATES > 1 one call returns several completions and the best is kept.
+        Near-duplicates of earlier reviews are rejected and regenerated.
+        """
+        token_usage = {}
         
         try:
-            print(f"\n🔄 Generating {star_rating}-star review using Sarvam AI API...")
-            print("⏳ Please wait...\n")
-            
-            response = requests.post(self.api_endpoint, headers=headers, json=payload, timeout=30)
-            
-            if response.status_code == 200:
-                result = response.json()
-                review_text = result['choices'][0]['message']['content'].strip()
+            for attempt in range(1, SIMILARITY_MAX_ATTEMPTS + 1):
+                # Build the perfect prompt (fresh structure and length on every attempt)
+                length = self.choose_length_range(min_chars, max_chars)
+                prompt = self.build_prompt(business_name, business_type, category, star_rating, language, use_case, *length)
+                
+                payload = self.build_payload(prompt, length[1], language, n=self.candidates)
+                
+                print(f"\n🔄 Generating {star_rating}-star review using Sarvam AI API...")
+                print("⏳ Please wait...\n")
+                
+                # Pooled keep-alive session; retries 429/5xx with backoff
+                response = post_chat_completion(self.api_endpoint, self.api_key, payload, timeout=30)
+                
+                if response.status_code != 200:
+                    return self.error_result(f"API Error {response.status_code}: {response.text}")
                 
-                # Remove quotes if AI added them
-                if review_text.startswith('"') and review_text.endswith('"'):
-                    review_text = review_text[1:-1]
-                if review_text.startswith("'") and review_text.endswith("'"):
-                    review_text = review_text[1:-1]
+                review_text, similarity, repaired, violations = self.read_completion(
+                    response, token_usage, business_name, *length)
                 
-                # Enforce character limit strictly
-                if len(review_text) > max_chars:
-                    # Trim to max_chars and find last complete sentence
-                    review_text = review_text[:max_chars]
-                    # Find last period, question mark, or other sentence ending
-                    last_period = max(review_text.rfind('.'), review_text.rfind('?'), review_text.rfind('।'))
-                    if last_period > min_chars:
-                        review_text = review_text[:last_period + 1]
+                # Reject near-duplicates and unfixable rule breaks while attempts remain
+                if self.should_regenerate(similarity, repaired, violations, attempt):
+                    if violations:
+                        print(f"♻️  Breaks the review rules ({', '.join(violations)}), regenerating...")
                     else:
-                        # If no good sentence break, just trim and add period
-                        review_text = review_text[:max_chars-1].rsplit(' ', 1)[0] + '.'
+                        print(f"♻️  Too similar to an earlier review ({similarity:.0%}), regenerating...")
+                    continue
                 
-                return {
-                    "success": True,
-                    "review": review_text,
-                    "char_count": len(review_text),
-                    "token_usage": result.get('usage', {}),
-                    "method": "api"
-                }
-            else:
-                return {
-                    "success": False,
-                    "error": f"API Error {response.status_code}: {response.text}",
-                    "review": None
-                }
+                return self.review_result(review_text, token_usage, similarity, attempt, repaired, violations)
         
+        except RateLimitExceeded as e:
+            return self.error_result(f"Rate limited: {str(e)}")
         except requests.exceptions.Timeout:
-            return {
-                "success": False,
-                "error": "Request timeout. API took too long to respond (30 seconds).",
-                "review": None
-            }
+            return self.error_result("Request timeout. API took too long to respond (30 seconds).")
         except requests.exceptions.RequestException as e:
-            return {
-                "success": False,
-                "error": f"Connection error: {str(e)}",
-                "review": None
-            }
+            return self.error_result(f"Connection error: {str(e)}")
         except Exception as e:
-            return {
-                "success": False,
-                "error": f"Unexpected error: {str(e)}",
-                "review": None
-            }
+            return self.error_result(f"Unexpected error: {str(e)}")
+    
+    async def generate_review_async(self, business_name, business_type, category, star_rating, language="English", use_case="Customer review", min_chars=None, max_chars=None):
+        """generate_review() for the ASGI path; the Sarvam call does not block the event loop,
+        and prompt building and similarity scoring (history reads) run in a worker thread"""
+        token_usage = {}
+        
+        try:
+            for attempt in range(1, SIMILARITY_MAX_ATTEMPTS + 1):
+                length = self.choose_length_range(min_chars, max_chars)
+                prompt = await asyncio.to_thread(
+                    self.build_prompt, business_name, business_type, category, star_rating, language, use_case, *length)
+                payload = self.build_payload(prompt, length[1], language, n=self.candidates)
+                
+                response = await async_post_chat_completion(self.api_endpoint, self.api_key, payload, timeout=30)
+                
+                if response.status_code != 200:
+                    return self.error_result(f"API Error {response.status_code}: {response.text}")
+                
+                review_text, similarity, repaired, violations = await asyncio.to_thread(
+                    self.read_completion, response, token_usage, business_name, *length)
+                
+                if self.should_regenerate(similarity, repaired, violations, attempt):
+                    continue
+                
+                return self.review_result(review_text, token_usage, similarity, attempt, repaired, violations)
+        
+        except RateLimitExceeded as e:
+            return self.error_result(f"Rate limited: {str(e)}")
+        except asyncio.TimeoutError:
+            return self.error_result("Request timeout. API took too long to respond (30 seconds).")
+        except aiohttp.ClientError as e:
+            return self.error_result(f"Connection error: {str(e)}")
+        except Exception as e:
+            return self.error_result(f"Unexpected error: {str(e)}")
+
+    def stream_review(self, business_name, business_type, category, star_rating, language="English", use_case="Customer review", min_chars=None, max_chars=None):
+        """
+        Stream a review as Sarvam AI writes it.
+        Yields ("token", text) for each piece, then ("done", result) with the same
+        result dict as generate_review(). Streamed text can't be taken back, so a
+        near-duplicate or rule break is reported ("similarity", "violations")
+        rather than regenerated.
+        """
+        token_usage = {}
+        
+        try:
+            # One streamed completion; several choices would arrive interleaved
+            min_chars, max_chars = self.choose_length_range(min_chars, max_chars)
+            prompt = self.build_prompt(business_name, business_type, category, star_rating, language, use_case, min_chars, max_chars)
+            payload = self.build_payload(prompt, max_chars, language)
+            
+            response, chunks = stream_chat_completion(self.api_endpoint, self.api_key, payload, timeout=30)
+            if response.status_code != 200:
+                yield "done", self.error_result(f"API Error {response.status_code}: {response.text}")
+                return
+            
+            parts = []
+            for chunk in chunks:
+                for key, value in (chunk.get('usage') or {}).items():
+                    if isinstance(value, (int, float)):
+                        token_usage[key] = value
+                choices = chunk.get('choices') or [{}]
+                text = (choices[0].get('delta') or {}).get('content')
+                if text:
+                    parts.append(text)
+                    yield "token", text
+            
+            # Repair, quote stripping and max_chars trimming need the whole text
+            review_text, similarity, repaired, violations = self.finalize_review(
+                "".join(parts), business_name, min_chars, max_chars)
+            self.should_regenerate(similarity, repaired, violations, SIMILARITY_MAX_ATTEMPTS)
+            yield "done", self.review_result(review_text, token_usage, similarity, 1, repaired, violations)
+        
+        except RateLimitExceeded as e:
+            yield "done", self.error_result(f"Rate limited: {str(e)}")
+        except requests.exceptions.Timeout:
+            yield "done", self.error_result("Request timeout. API took too long to respond (30 seconds).")
+        except requests.exceptions.RequestException as e:
+            yield "done", self.error_result(f"Connection error: {str(e)}")
+        except Exception as e:
+            yield "done", self.error_result(f"Unexpected error: {str(e)}")
+    
+    async def stream_review_async(self, business_name, business_type, category, star_rating, language="English", use_case="Customer review", min_chars=None, max_chars=None):
+        """stream_review() for the ASGI path: an async generator of the same events;
+        prompt building and the final similarity check run in a worker thread"""
+        token_usage = {}
+        
+        try:
+            min_chars, max_chars = self.choose_length_range(min_chars, max_chars)
+            prompt = await asyncio.to_thread(
+                self.build_prompt, business_name, business_type, category, star_rating, language, use_case, min_chars, max_chars)
+            payload = self.build_payload(prompt, max_chars, language)
+            
+            response, chunks = await async_stream_chat_completion(self.api_endpoint, self.api_key, payload, timeout=30)
+            if response.status_code != 200:
+                yield "done", self.error_result(f"API Error {response.status_code}: {response.text}")
+                return
+            
+            parts = []
+            try:
+                async for chunk in chunks:
+                    for key, value in (chunk.get('usage') or {}).items():
+                        if isinstance(value, (int, float)):
+                            token_usage[key] = value
+                    choices = chunk.get('choices') or [{}]
+                    text = (choices[0].get('delta') or {}).get('content')
+                    if text:
+                        parts.append(text)
+                        yield "token", text
+            finally:
+                await chunks.aclose()  # releases the upstream connection if the client left early
+            
+            review_text, similarity, repaired, violations = await asyncio.to_thread(
+                self.finalize_review, "".join(parts), business_name, min_chars, max_chars)
+            self.should_regenerate(similarity, repaired, violations, SIMILARITY_MAX_ATTEMPTS)
+            yield "done", self.review_result(review_text, token_usage, similarity, 1, repaired, violations)
+        
+        except RateLimitExceeded as e:
+            yield "done", self.error_result(f"Rate limited: {str(e)}")
+        except asyncio.TimeoutError:
+            yield "done", self.error_result("Request timeout. API took too long to respond (30 seconds).")
+        except aiohttp.ClientError as e:
+            yield "done", self.error_result(f"Connection error: {str(e)}")
+        except Exception as e:
+            yield "done", self.error_result(f"Unexpected error: {str(e)}")
+    
+    def generate_batch(self, specs, concurrency=BATCH_CONCURRENCY):
+        """
+        Generate reviews for many specs concurrently on a bounded thread pool.
+        Each spec is a dict of generate_review() keyword arguments; specs may be
+        any iterable, only `concurrency` of them are in flight at a time.
+        Yields (index, spec, result) in completion order, not input order.
+        Closing the generator early cancels the specs that have not started.
+        Results are not saved yet, so each one is also checked against the
+        batch's earlier results and regenerated if it is a near-duplicate.
+        """
+        specs = enumerate(specs)
+        executor = ThreadPoolExecutor(max_workers=max(1, concurrency))
+        in_flight = {}
+        siblings = SiblingSet()
+        regenerated = {}   # index -> (sibling collisions regenerated, token usage spent on them)
+        
+        def submit(count):
+            for index, spec in itertools.islice(specs, count):
+                in_flight[executor.submit(self.generate_review, **spec)] = (index, spec)
+        
+        try:
+            submit(max(1, concurrency))
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, spec = in_flight.pop(future)
+                    result = future.result()
+                    if result['success']:
+                        tries, spent = regenerated.pop(index, (0, {}))
+                        if siblings.score(result['review']) >= SIMILARITY_THRESHOLD and tries + 1 < SIMILARITY_MAX_ATTEMPTS:
+                            print("♻️  Too similar to another review in this batch, regenerating...")
+                            for key, value in result['token_usage'].items():
+                                spent[key] = spent.get(key, 0) + value
+                            regenerated[index] = (tries + 1, spent)
+                            in_flight[executor.submit(self.generate_review, **spec)] = (index, spec)
+                            continue
+                        for key, value in spent.items():
+                            result['token_usage'][key] = result['token_usage'].get(key, 0) + value
+                        siblings.add(result['review'])
+                    submit(1)
+                    yield index, spec, result
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_generator = None
+_generator_lock = threading.Lock()
+
+
+def get_review_generator():
+    """Return the process-wide ReviewGenerator (raises MissingAPIKeyError)"""
+    global _generator
+    if _generator is None:
+        with _generator_lock:
+            if _generator is None:
+                _generator = ReviewGenerator()
+    return _generator
 
 
 def print_api_info():
@@ -303,30 +507,24 @@ def print_api_info():
     print("=" * 70)
     print("\n📊 SETTINGS:")
     print("  • Temperature: 0.8 (High creativity)")
-    print("  • Max Tokens: 120 (Controlled length)")
+    print("  • Max Tokens: sized from the requested length range and language")
+    print(f"  • Candidates per Call: {REVIEW_CANDIDATES} (set REVIEW_CANDIDATES to pick the best of several)")
     print("  • Frequency Penalty: 0.5 (Reduce repetition)")
     print("  • Presence Penalty: 0.3 (Topic diversity)")
-    print("  • Character Range: 200-350 (STRICTLY ENFORCED)")
+    print("  • Character Range: 20-300, varied per review (STRICTLY ENFORCED)")
+    print(f"  • Connection Pool: {SARVAM_POOL_SIZE} keep-alive connections")
+    print(f"  • Retries: {SARVAM_MAX_RETRIES} on 429/5xx (exponential backoff + jitter, honors Retry-After)")
+    print(f"  • Prompt Mode: {PROMPT_MODE} (set PROMPT_MODE=compact for fewer prompt tokens)")
     print("\n✅ API Key Status: CONFIGURED")
     print("\n💡 Rate Limits:")
-    print("  • Check your dashboard: https://dashboard.sarvam.ai/")
+    print(f"  • Client budget: {SARVAM_REQUESTS_PER_SECOND:g} requests/sec, {SARVAM_TOKENS_PER_MINUTE:g} tokens/min")
+    print("  • Requests queue for budget instead of hitting 429s")
+    print("  • Match these to your plan on the dashboard: https://dashboard.sarvam.ai/")
     print("=" * 70 + "\n")
 
 
-def main():
-    """Main function with interactive menu"""
-    
-    print("=" * 70)
-    print("       🌟 AI REVIEW GENERATOR - By Sarvam AI 🌟")
-    print("=" * 70)
-    
-    generator = ReviewGenerator()
-    
-    # Show API configuration option
-    show_info = input("\n📖 View API configuration? (y/n): ").strip().lower()
-    if show_info == 'y':
-        print_api_info()
-    
+def generate_interactively(generator):
+    """Ask for one review's details, generate it and print the result"""
     print("\n" + "─" * 70)
     print("                    REVIEW CONFIGURATION")
     print("─" * 70)
@@ -424,17 +622,75 @@ def main():
         print("  • Review your rate limits on dashboard")
         print("=" * 70 + "\n")
         sys.exit(1)
+
+
+def main():
+    """Main function with interactive menu"""
+    
+    print("=" * 70)
+    print("       🌟 AI REVIEW GENERATOR - By Sarvam AI 🌟")
+    print("=" * 70)
+    
+    generator = get_review_generator()
+    
+    # Show API configuration option
+    show_info = input("\n📖 View API configuration? (y/n): ").strip().lower()
+    if show_info == 'y':
+        print_api_info()
     
-    # Generate another?
-    another = input("Generate another review? (y/n): ").strip().lower()
-    if another == 'y':
+    # Loop rather than recurse, so long sessions never hit the recursion limit
+    while True:
+        generate_interactively(generator)
+        
+        # Generate another?
+        another = input("Generate another review? (y/n): ").strip().lower()
+        if another != 'y':
+            break
         print("\n")
-        main()
+
+
+def bulk_main(args):
+    """`bulk` subcommand: generate every spec in a CSV/JSONL file without prompts"""
+    from bulk_generation import run_bulk
+    
+    output = args.output or os.path.splitext(args.specs)[0] + ".results.jsonl"
+    try:
+        summary = run_bulk(get_review_generator(), args.specs, output, args.concurrency)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print(f"\n\n⏸️  Interrupted. Finished reviews are in {output}; run the same command to resume.")
+        sys.exit(130)
+    
+    print(f"\n✅ {summary['succeeded']} generated, {summary['failed']} failed, "
+          f"{summary['skipped']} skipped (already done) -> {output}")
+    if summary['failed']:
+        print("💡 Run the same command again to retry the failed specs")
+        sys.exit(1)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="AI review generator (interactive without a subcommand)")
+    subcommands = parser.add_subparsers(dest="command")
+    bulk = subcommands.add_parser("bulk", help="generate reviews for every spec in a CSV or JSONL file")
+    bulk.add_argument("specs", help="CSV (with header) or JSONL file of review specs")
+    bulk.add_argument("--output", "-o", help="results JSONL, also the resume checkpoint (default: <specs>.results.jsonl)")
+    bulk.add_argument("--concurrency", "-c", type=int, default=BATCH_CONCURRENCY,
+                      help=f"concurrent Sarvam calls (default: {BATCH_CONCURRENCY})")
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
+    args = parse_args()
     try:
-        main()
+        if args.command == "bulk":
+            bulk_main(args)
+        else:
+            main()
+    except MissingAPIKeyError:
+        print_api_key_help()
+        sys.exit(1)
     except KeyboardInterrupt:
         print("\n\n👋 Review generator closed. Goodbye!")
         sys.exit(0)
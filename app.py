@@ -1,34 +1,178 @@
-from flask import Flask, render_template, request, jsonify, send_file, make_response
+from flask import Flask, Response, render_template, request, jsonify, send_file, redirect, url_for
 import json
 import os
 import csv
+import time
+import zlib
 from datetime import datetime
-from io import StringIO, BytesIO
-from advanced_review_generator import ReviewGenerator
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib import colors
+from advanced_review_generator import get_review_generator, print_api_key_help, MissingAPIKeyError
+from history_cache import get_history_cache
+from review_store import new_review_id
+from review_index import ReviewIndex, FILTER_FIELDS, review_id
+from review_stats import ReviewStats
+from review_search import SearchIndex
+import pdf_export
+from rate_limiter import get_rate_limiter
+import metrics
+from generation_cache import SingleFlight, ReviewPool, spec_key, load_warm_specs
 
 app = Flask(__name__)
 
-# File to store reviews
-REVIEWS_FILE = "reviews_history.json"
+# Append-only review storage (migrates reviews_history.json on first start),
+# kept parsed in memory and shared with ReviewGenerator
+history_cache = get_history_cache()
+review_index = ReviewIndex(history_cache)
+review_stats = ReviewStats(history_cache)
+search_index = SearchIndex(history_cache)
+
+# /api/reviews page size
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# One generator per worker process, shared by all requests; refuse to start without a key
+try:
+    review_generator = get_review_generator()
+except MissingAPIKeyError:
+    print_api_key_help()
+    raise
+
+# Identical concurrent /generate submissions share one upstream call
+generate_coalescer = SingleFlight()
+
+# Opt-in pool of pre-generated reviews per spec (REVIEW_POOL_SIZE > 0),
+# persisted per worker (review_pool.<slot>.json) and warmed for REVIEW_POOL_SPECS_FILE
+review_pool = ReviewPool(lambda spec: review_generator.generate_review(**spec))
+
+# Largest number of reviews one /generate/batch request may ask for
+MAX_BATCH_SIZE = 100
+
+# /history page size
+HISTORY_PAGE_SIZE = 20
+MAX_HISTORY_PAGE_SIZE = 100
 
 def load_reviews():
-    """Load reviews from JSON file"""
-    if os.path.exists(REVIEWS_FILE):
-        with open(REVIEWS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return []
+    """Load reviews from the in-memory history cache"""
+    return history_cache.all()
 
 def save_review(review_data):
-    """Save review to JSON file"""
-    reviews = load_reviews()
-    reviews.append(review_data)
-    with open(REVIEWS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(reviews, f, indent=2, ensure_ascii=False)
+    """Append review to the review store and the history cache"""
+    history_cache.append(review_data)
+
+def parse_review_filters(args):
+    """Read filter query params (business_name, star_rating, ..., since, until)"""
+    filters = {}
+    for field in FILTER_FIELDS:
+        value = args.get(field, '').strip()
+        if value:
+            filters[field] = value
+    if 'star_rating' in filters and not filters['star_rating'].isdigit():
+        raise ValueError("star_rating must be a number")
+    since = args.get('since', '').strip() or None
+    until = args.get('until', '').strip() or None
+    return filters, since, until
+
+def project_review(seq, review, fields=None, exclude=None):
+    """Keep only the requested fields of a review; the id is always included"""
+    if fields:
+        projected = {key: review[key] for key in fields if key in review}
+    elif exclude:
+        projected = {key: value for key, value in review.items() if key not in exclude}
+    else:
+        projected = dict(review)
+    projected['id'] = review_id(seq, review)
+    return projected
+
+def select_reviews(args):
+    """Resolve the reviews an export asked for via ids=, or all of them"""
+    ids_param = args.get('ids', '')
+    if not ids_param:
+        return load_reviews()
+
+    # O(k) lookups through the id index, only the selected records are touched
+    selected = [review_index.get_by_id(rid) for rid in ids_param.split(',') if rid]
+    return [review for review in selected if review is not None]
+
+def build_review_record(spec, result):
+    """Shape a successful generation result into the stored review record"""
+    return {
+        'id': new_review_id(),
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'business_name': spec['business_name'],
+        'business_type': spec['business_type'],
+        'category': spec['category'],
+        'star_rating': spec['star_rating'],
+        'language': spec['language'],
+        'use_case': spec['use_case'],
+        'review': result['review'],
+        'char_count': result['char_count'],
+        'token_usage': result.get('token_usage', {}),
+        'method': result['method']
+    }
+
+def parse_generate_form(form):
+    """Read the /generate form into a generation spec"""
+    spec = {
+        'business_name': form.get('business_name'),
+        'business_type': form.get('business_type'),
+        'category': form.get('category'),
+        'star_rating': int(form.get('star_rating')),
+        'language': form.get('language'),
+        'use_case': form.get('use_case')
+    }
+    if not all([spec['business_name'], spec['business_type'], spec['category']]):
+        raise ValueError('All fields are required!')
+    return spec
+
+def generation_response(result, review_data, source):
+    """JSON body /generate returns for a generation result"""
+    if not result['success']:
+        return {
+            'success': False,
+            'error': result.get('error', 'Unknown error occurred')
+        }
+    return {
+        'success': True,
+        'id': review_data['id'],
+        'review': result['review'],
+        'char_count': result['char_count'],
+        'token_usage': result.get('token_usage', {}),
+        'method': result['method'],
+        'source': source
+    }
+
+def generate_and_save(spec):
+    """Serve spec from the review pool or Sarvam and store it; returns (result, review_data, source)"""
+    result = review_pool.take(spec)
+    source = 'pool'
+    if result is None:
+        result = review_generator.generate_review(**spec)
+        source = 'live'
+    review_data = None
+    if result['success']:
+        review_data = build_review_record(spec, result)
+        save_review(review_data)
+    return result, review_data, source
+
+def parse_batch_spec(raw):
+    """Validate one /generate/batch spec, filling the same defaults as the form"""
+    spec = {
+        'business_name': str(raw.get('business_name') or '').strip(),
+        'business_type': str(raw.get('business_type') or '').strip(),
+        'category': str(raw.get('category') or '').strip(),
+        'star_rating': int(raw.get('star_rating', 5)),
+        'language': raw.get('language') or 'English',
+        'use_case': raw.get('use_case') or 'Customer review'
+    }
+    if not all([spec['business_name'], spec['business_type'], spec['category']]):
+        raise ValueError('business_name, business_type and category are required')
+    if not 1 <= spec['star_rating'] <= 5:
+        raise ValueError('star_rating must be between 1 and 5')
+    return spec
+
+# Keep configured specs filled before the first request for them
+if review_pool.enabled:
+    for raw_spec in load_warm_specs():
+        review_pool.warm(parse_batch_spec(raw_spec))
 
 @app.route('/')
 def index():
@@ -39,109 +183,265 @@ def index():
 def generate():
     """Generate review via API"""
     try:
-        # Get form data
-        business_name = request.form.get('business_name')
-        business_type = request.form.get('business_type')
-        category = request.form.get('category')
-        star_rating = int(request.form.get('star_rating'))
-        language = request.form.get('language')
-        use_case = request.form.get('use_case')
+        spec = parse_generate_form(request.form)
         
-        # Validate inputs
-        if not all([business_name, business_type, category]):
-            return jsonify({'success': False, 'error': 'All fields are required!'})
-        
-        # Generate review
-        generator = ReviewGenerator()
-        result = generator.generate_review(
-            business_name=business_name,
-            business_type=business_type,
-            category=category,
-            star_rating=star_rating,
-            language=language,
-            use_case=use_case
+        # Double-clicks and frontend retries wait for the in-flight call instead of making their own
+        (result, review_data, source), shared = generate_coalescer.do(
+            spec_key(spec), lambda: generate_and_save(spec)
         )
         
-        if result['success']:
-            # Prepare data to save
-            review_data = {
-                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'business_name': business_name,
-                'business_type': business_type,
-                'category': category,
-                'star_rating': star_rating,
-                'language': language,
-                'use_case': use_case,
-                'review': result['review'],
-                'char_count': result['char_count'],
-                'token_usage': result.get('token_usage', {}),
-                'method': result['method']
-            }
-            
-            # Save to file
-            save_review(review_data)
-            
-            return jsonify({
-                'success': True,
-                'review': result['review'],
-                'char_count': result['char_count'],
-                'token_usage': result.get('token_usage', {}),
-                'method': result['method']
-            })
-        else:
-            return jsonify({
-                'success': False,
-                'error': result.get('error', 'Unknown error occurred')
-            })
-            
+        return jsonify(generation_response(result, review_data, 'coalesced' if shared else source))
+    
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         })
 
+def sse_event(event, data):
+    """One server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.route('/generate/stream', methods=['POST'])
+def generate_stream():
+    """
+    Generate a review and stream it to the browser as server-sent events:
+    "token" events carry text as it arrives, the final "done" event carries
+    the same JSON /generate returns (with the cleaned, trimmed review).
+    """
+    try:
+        spec = parse_generate_form(request.form)
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    def stream():
+        pooled = review_pool.take(spec)
+        if pooled is not None:
+            events = [("token", pooled['review']), ("done", pooled)]
+            source = 'pool'
+        else:
+            events = review_generator.stream_review(**spec)
+            source = 'stream'
+        
+        for event, data in events:
+            if event == "token":
+                yield sse_event("token", {'text': data})
+                continue
+            review_data = None
+            if data['success']:
+                review_data = build_review_record(spec, data)
+                save_review(review_data)
+            yield sse_event("done", generation_response(data, review_data, source))
+    
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/generate/batch', methods=['POST'])
+def generate_batch():
+    """
+    Generate many reviews concurrently.
+    Body: {"specs": [{...}, ...]} or {"spec": {...}, "count": N}.
+    Streams one JSON line per review as it finishes, then a summary line;
+    successful reviews are saved with a single bulk write at the end, or as
+    soon as the client disconnects.
+    """
+    body = request.get_json(silent=True) or {}
+    try:
+        if 'specs' in body:
+            raw_specs = body['specs']
+            count = len(raw_specs)
+        else:
+            raw_specs = None
+            count = int(body.get('count', 1))
+        
+        # Check the size before building anything
+        if count <= 0:
+            return jsonify({'success': False, 'error': 'No specs given'}), 400
+        if count > MAX_BATCH_SIZE:
+            return jsonify({'success': False, 'error': f'At most {MAX_BATCH_SIZE} reviews per batch'}), 400
+        
+        if raw_specs is not None:
+            specs = [parse_batch_spec(raw) for raw in raw_specs]
+        else:
+            specs = [parse_batch_spec(body.get('spec') or {})] * count
+    except (TypeError, ValueError, AttributeError) as e:
+        return jsonify({'success': False, 'error': f'Invalid batch: {e}'}), 400
+    
+    def stream():
+        records = []
+        try:
+            for index, spec, result in review_generator.generate_batch(specs):
+                if result['success']:
+                    review_data = build_review_record(spec, result)
+                    records.append(review_data)
+                    line = {'index': index, 'success': True, 'id': review_data['id'], 'review': result['review'],
+                            'char_count': result['char_count'], 'token_usage': result.get('token_usage', {}),
+                            'method': result['method']}
+                else:
+                    line = {'index': index, 'success': False, 'error': result.get('error', 'Unknown error occurred')}
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+        finally:
+            # One locked append for the whole batch; also runs when the client
+            # disconnects (GeneratorExit), so reviews already paid for are kept
+            if records:
+                history_cache.append_many(records)
+        yield json.dumps({'done': True, 'requested': len(specs), 'saved': len(records)}) + "\n"
+    
+    return Response(stream(), mimetype='application/x-ndjson')
+
 @app.route('/history')
 def history():
-    """View all generated reviews"""
-    reviews = load_reviews()
-    return render_template('history.html', reviews=reviews)
+    """View generated reviews one page at a time, newest first"""
+    try:
+        per_page = min(max(int(request.args.get('per_page', HISTORY_PAGE_SIZE)), 1), MAX_HISTORY_PAGE_SIZE)
+        before = request.args.get('before', type=int)
+        after = request.args.get('after', type=int)
+        filters, since, until = parse_review_filters(request.args)
+    except ValueError:
+        return redirect(url_for('history'))
+
+    # One extra row tells us whether there is another page in that direction
+    page = review_index.query(filters, before=before, after=after, limit=per_page + 1, since=since, until=until)
+    if after is not None:
+        has_newer = len(page) > per_page
+        has_older = True
+        page = page[-per_page:]
+    else:
+        has_newer = before is not None
+        has_older = len(page) > per_page
+        page = page[:per_page]
+
+    # Keep filters and page size on the navigation links
+    params = dict(filters, per_page=per_page)
+    if since:
+        params['since'] = since
+    if until:
+        params['until'] = until
+    newer_url = url_for('history', after=page[0][0], **params) if page and has_newer else None
+    older_url = url_for('history', before=page[-1][0], **params) if page and has_older else None
+
+    return render_template(
+        'history.html',
+        page=[(review_id(seq, review), review) for seq, review in page],
+        total=len(history_cache),
+        filters=filters,
+        since=since or '',
+        until=until or '',
+        per_page=per_page,
+        newer_url=newer_url,
+        older_url=older_url
+    )
 
 @app.route('/health')
 def health_check():
     """API Health Check Page"""
-    return render_template('health.html')
+    return render_template('health.html', limits=get_rate_limiter().status())
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Latency histograms and counters of this worker, Prometheus text format"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/pool')
+def api_pool():
+    """Review pool fill levels, hit rate and refill throughput"""
+    return jsonify(review_pool.status())
+
+@app.route('/api/stats')
+def api_stats():
+    """Review counts, token spend and average length per business, rating, language, use case and day"""
+    return Response(review_stats.snapshot_json(), mimetype='application/json')
 
 @app.route('/api/reviews')
 def api_reviews():
-    """API endpoint to get all reviews"""
-    reviews = load_reviews()
-    return jsonify(reviews)
+    """API endpoint to page through reviews, newest first
 
-@app.route('/download/csv')
-def download_csv():
-    """Download reviews as CSV file"""
-    reviews = load_reviews()
-    
-    if not reviews:
-        return "No reviews to download", 404
-    
-    # Get selected indices from query parameter
-    indices_param = request.args.get('indices', '')
-    if indices_param:
-        try:
-            selected_indices = [int(i) for i in indices_param.split(',')]
-            # Reverse the reviews list to match the display order
-            reviews_reversed = list(reversed(reviews))
-            reviews = [reviews_reversed[i] for i in selected_indices if i < len(reviews_reversed)]
-        except (ValueError, IndexError):
-            return "Invalid indices", 400
-    
-    if not reviews:
-        return "No reviews selected", 400
-    
-    # Create CSV in memory
-    output = StringIO()
-    writer = csv.writer(output)
+    Query params: limit, cursor, business_name, star_rating, language,
+    use_case, method, since, until, fields (comma separated), exclude.
+    """
+    try:
+        limit = min(max(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+        cursor = request.args.get('cursor', '').strip()
+        before = int(cursor) if cursor else None
+        filters, since, until = parse_review_filters(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Invalid query: {e}'}), 400
+
+    fields = [f for f in request.args.get('fields', '').split(',') if f]
+    exclude = set(f for f in request.args.get('exclude', '').split(',') if f)
+
+    # Fetch one extra row to know whether another page exists
+    page = review_index.query(filters, before=before, limit=limit + 1, since=since, until=until)
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = str(page[-1][0])
+
+    return jsonify({
+        'reviews': [project_review(seq, review, fields, exclude) for seq, review in page],
+        'count': len(page),
+        'next_cursor': next_cursor
+    })
+
+@app.route('/api/reviews/search')
+def api_reviews_search():
+    """Full-text search over review text and business fields, best match first
+
+    Query params: q, limit, fields (comma separated), exclude.
+    Every word of q must match; spelling variants of Romanized Hindi/Gujarati are folded together.
+    Only the newest SEARCH_MAX_CANDIDATES (2000) matches are ranked; "truncated" is true when
+    older reviews were left out. Right after a worker starts, while the index is still being
+    built, only the newest SEARCH_SCAN_RECENT (5000) reviews are searched.
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'success': False, 'error': 'Missing search query (q)'}), 400
+    try:
+        limit = min(max(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Invalid query: {e}'}), 400
+
+    fields = [f for f in request.args.get('fields', '').split(',') if f]
+    exclude = set(f for f in request.args.get('exclude', '').split(',') if f)
+
+    results, truncated = search_index.search(query, limit=limit)
+    reviews = []
+    for seq, review, score in results:
+        projected = project_review(seq, review, fields, exclude)
+        projected['score'] = score
+        reviews.append(projected)
+
+    return jsonify({'query': query, 'reviews': reviews, 'count': len(reviews), 'truncated': truncated})
+
+@app.route('/api/reviews/search/rebuild', methods=['POST'])
+def api_reviews_search_rebuild():
+    """Rebuild the search index from the review store"""
+    search_index.rebuild()
+    return jsonify({'success': True, **search_index.status()})
+
+# Rows buffered before each streamed CSV chunk is flushed
+CSV_CHUNK_ROWS = 200
+
+class _LineBuffer:
+    """File-like sink that hands csv.writer output back to the caller"""
+    def __init__(self):
+        self.parts = []
+
+    def write(self, text):
+        self.parts.append(text)
+
+    def drain(self):
+        text = "".join(self.parts)
+        self.parts = []
+        return text
+
+def csv_chunks(reviews):
+    """Yield the CSV export in chunks of CSV_CHUNK_ROWS rows"""
+    # Render time only; time spent waiting on the client between chunks is excluded
+    rendering = 0.0
+    started = time.perf_counter()
+    buffer = _LineBuffer()
+    writer = csv.writer(buffer)
     
     # Write header
     writer.writerow([
@@ -151,7 +451,7 @@ def download_csv():
     ])
     
     # Write data
-    for review in reviews:
+    for count, review in enumerate(reviews, 1):
         writer.writerow([
             review.get('timestamp', ''),
             review.get('business_name', ''),
@@ -165,123 +465,123 @@ def download_csv():
             review.get('token_usage', {}).get('total_tokens', 'N/A'),
             review.get('method', '')
         ])
+        if count % CSV_CHUNK_ROWS == 0:
+            chunk = buffer.drain().encode('utf-8')
+            rendering += time.perf_counter() - started
+            yield chunk
+            started = time.perf_counter()
+    
+    chunk = buffer.drain().encode('utf-8')
+    metrics.EXPORT_RENDER_SECONDS.observe(rendering + time.perf_counter() - started, format='csv')
+    yield chunk
+
+def gzip_chunks(chunks):
+    """Gzip a stream of byte chunks on the fly"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+@app.route('/download/csv', methods=['GET', 'POST'])
+def download_csv():
+    """Stream reviews as a CSV file, gzip-encoded when the client accepts it"""
+    if not len(history_cache):
+        return "No reviews to download", 404
     
-    # Prepare response
-    output.seek(0)
-    response = make_response(output.getvalue())
-    response.headers['Content-Type'] = 'text/csv'
-    response.headers['Content-Disposition'] = f'attachment; filename=reviews_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+    # Selected review ids come as ids= in the query or, for large selections, a POSTed form;
+    # without ids stream the whole store
+    if request.values.get('ids'):
+        reviews = select_reviews(request.values)
+        if not reviews:
+            return "No reviews selected", 400
+    else:
+        reviews = (review for _, review in history_cache.store.iter_from(0))
     
-    return response
+    chunks = csv_chunks(reviews)
+    headers = {
+        'Content-Disposition': f'attachment; filename=reviews_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv',
+        'Vary': 'Accept-Encoding'
+    }
+    if request.values.get('gzip', '1') != '0' and request.accept_encodings['gzip']:
+        chunks = gzip_chunks(chunks)
+        headers['Content-Encoding'] = 'gzip'
+    
+    return Response(chunks, mimetype='text/csv', headers=headers)
+
+def pdf_selection(args):
+    """Resolve a PDF export selection into (cache key, reviews)"""
+    # The same ids in any order are the same export: render them in store order
+    ids = sorted({rid for rid in args.get('ids', '').split(',') if rid},
+                 key=lambda rid: review_index.by_id.get(rid, -1))
+    if ids:
+        return pdf_export.selection_key(ids), select_reviews({'ids': ','.join(ids)})
+    # The store is append-only, so "everything" is identified by its size
+    reviews = load_reviews()
+    return pdf_export.selection_key(['all', str(len(reviews))]), reviews
+
+def send_pdf(path):
+    """Send a cached PDF export as a download"""
+    return send_file(
+        path,
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=f'reviews_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'
+    )
 
 @app.route('/download/pdf')
 def download_pdf():
-    """Download reviews as PDF file"""
-    reviews = load_reviews()
-    
-    if not reviews:
+    """Download reviews as PDF file (large selections: POST /download/pdf/jobs renders in the background)"""
+    if not len(history_cache):
         return "No reviews to download", 404
     
-    # Get selected indices from query parameter
-    indices_param = request.args.get('indices', '')
-    if indices_param:
-        try:
-            selected_indices = [int(i) for i in indices_param.split(',')]
-            # Reverse the reviews list to match the display order
-            reviews_reversed = list(reversed(reviews))
-            reviews = [reviews_reversed[i] for i in selected_indices if i < len(reviews_reversed)]
-        except (ValueError, IndexError):
-            return "Invalid indices", 400
+    # Get selected review ids from query parameter
+    key, reviews = pdf_selection(request.args)
     
     if not reviews:
         return "No reviews selected", 400
     
-    # Create PDF in memory
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=18)
-    
-    # Container for PDF elements
-    elements = []
+    # Same selection exported before: serve it straight from the cache
+    cached = pdf_export.cached_pdf(key)
+    if cached:
+        return send_pdf(cached)
     
-    # Styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#667eea'),
-        spaceAfter=30,
-        alignment=1
-    )
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=14,
-        textColor=colors.HexColor('#764ba2'),
-        spaceAfter=12,
-        spaceBefore=12
-    )
-    normal_style = styles['Normal']
-    
-    # Title
-    elements.append(Paragraph("AI Review Generator - Export Report", title_style))
-    elements.append(Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", normal_style))
-    elements.append(Paragraph(f"Total Reviews: {len(reviews)}", normal_style))
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Add each review
-    for idx, review in enumerate(reviews, 1):
-        # Review header
-        elements.append(Paragraph(f"Review #{idx}", heading_style))
-        
-        # Create info table
-        data = [
-            ['Business Name:', review.get('business_name', 'N/A')],
-            ['Type:', review.get('business_type', 'N/A')],
-            ['Category:', review.get('category', 'N/A')],
-            ['Rating:', '★' * review.get('star_rating', 0)],
-            ['Language:', review.get('language', 'N/A')],
-            ['Use Case:', review.get('use_case', 'N/A')],
-            ['Date:', review.get('timestamp', 'N/A')],
-        ]
-        
-        table = Table(data, colWidths=[1.5*inch, 4*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f0f0f0')),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey)
-        ]))
-        elements.append(table)
-        elements.append(Spacer(1, 0.2*inch))
-        
-        # Review text
-        elements.append(Paragraph("<b>Review:</b>", normal_style))
-        review_text = review.get('review', 'N/A')
-        elements.append(Paragraph(review_text, normal_style))
-        
-        # Stats
-        char_count = review.get('char_count', 'N/A')
-        tokens = review.get('token_usage', {}).get('total_tokens', 'N/A')
-        elements.append(Spacer(1, 0.1*inch))
-        elements.append(Paragraph(f"<i>Characters: {char_count} | Tokens: {tokens}</i>", normal_style))
-        
-        elements.append(Spacer(1, 0.4*inch))
+    return send_pdf(pdf_export.export_pdf(key, reviews))
+
+@app.route('/download/pdf/jobs', methods=['POST'])
+def start_pdf_job():
+    """Start a background PDF export for ids= (or everything)"""
+    if not len(history_cache):
+        return jsonify({'success': False, 'error': 'No reviews to download'}), 404
     
-    # Build PDF
-    doc.build(elements)
-    buffer.seek(0)
+    key, reviews = pdf_selection(request.values)
+    if not reviews:
+        return jsonify({'success': False, 'error': 'No reviews selected'}), 400
     
-    return send_file(
-        buffer,
-        mimetype='application/pdf',
-        as_attachment=True,
-        download_name=f'reviews_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'
-    )
+    status = pdf_export.start_job(key, reviews)
+    return jsonify(dict(
+        status,
+        success=True,
+        status_url=url_for('pdf_job_status', job_id=key),
+        download_url=url_for('pdf_job_file', job_id=key)
+    )), 202
+
+@app.route('/download/pdf/jobs/<job_id>')
+def pdf_job_status(job_id):
+    """Status of a background PDF export"""
+    status = pdf_export.job_status(job_id)
+    if status is None:
+        return jsonify({'success': False, 'error': 'Unknown export job'}), 404
+    return jsonify(dict(status, success=True, download_url=url_for('pdf_job_file', job_id=job_id)))
+
+@app.route('/download/pdf/jobs/<job_id>/file')
+def pdf_job_file(job_id):
+    """Download the PDF produced by a finished export job"""
+    path = pdf_export.cached_pdf(job_id)
+    if not path:
+        return "Export not ready", 404
+    return send_pdf(path)
 
 if __name__ == '__main__':
     # Get port from environment variable (for cloud deployment) or use 5000 for local
@@ -294,7 +594,7 @@ if __name__ == '__main__':
         print("=" * 70)
         print("\n✅ Server starting...")
         print(f"📍 Open your browser and go to: http://localhost:{port}")
-        print("💾 Reviews are saved to: reviews_history.json")
+        print(f"💾 Reviews are saved to: {history_cache.store.path}")
         print("\n⚠️  Press CTRL+C to stop the server")
         print("=" * 70 + "\n")
     
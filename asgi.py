@@ -0,0 +1,172 @@
+"""
+ASGI entry point for the review generator.
+
+POST /generate and POST /generate/stream (used by the browser UI) run on
+the event loop and await Sarvam AI through a non-blocking HTTP client, so
+one process holds hundreds of in-flight generations. Every other route is served by the Flask app in app.py on a
+pool of WSGI_THREADS threads, so slow routes do not queue behind each other.
+
+    uvicorn asgi:app --host 0.0.0.0 --port $PORT
+"""
+import asyncio
+import io
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from werkzeug.formparser import FormDataParser
+from werkzeug.http import parse_options_header
+
+from app import (
+    app as flask_app, review_generator, review_pool, build_review_record, save_review,
+    parse_generate_form, generation_response, sse_event
+)
+from generation_cache import AsyncSingleFlight, spec_key
+from sarvam_client import close_async_session
+
+# Threads running Flask routes; each one is held for the whole response (e.g. a streamed export)
+WSGI_THREADS = int(os.getenv("WSGI_THREADS", "32"))
+wsgi_executor = ThreadPoolExecutor(max_workers=WSGI_THREADS, thread_name_prefix="wsgi")
+
+
+class ThreadedWsgiInstance(WsgiToAsgiInstance):
+    """WsgiToAsgiInstance that runs the app on wsgi_executor
+
+    asgiref's default (thread_sensitive=True) runs every WSGI request on one
+    shared thread, one at a time.
+    """
+    run_wsgi_app = sync_to_async(WsgiToAsgiInstance.__dict__['run_wsgi_app'].func,
+                                 thread_sensitive=False, executor=wsgi_executor)
+
+
+class ThreadedWsgiToAsgi(WsgiToAsgi):
+    async def __call__(self, scope, receive, send):
+        await ThreadedWsgiInstance(self.wsgi_application, self.duplicate_header_limit)(scope, receive, send)
+
+
+wsgi_app = ThreadedWsgiToAsgi(flask_app)
+generate_coalescer = AsyncSingleFlight()
+
+
+async def read_body(receive):
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+async def send_json(send, body, status=200):
+    data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(data)).encode())],
+    })
+    await send({"type": "http.response.body", "body": data})
+
+
+def parse_form(scope, body):
+    """Decode a urlencoded or multipart form body like Flask's request.form"""
+    headers = dict(scope["headers"])
+    mimetype, options = parse_options_header(headers.get(b"content-type", b"").decode("latin-1"))
+    _, form, _ = FormDataParser().parse(io.BytesIO(body), mimetype, len(body), options)
+    return form
+
+
+async def generate_and_save(spec):
+    """Async generate_and_save() from app.py; pool, similarity and store work runs off the loop"""
+    result = await asyncio.to_thread(review_pool.take, spec)
+    source = 'pool'
+    if result is None:
+        result = await review_generator.generate_review_async(**spec)
+        source = 'live'
+    review_data = None
+    if result['success']:
+        review_data = build_review_record(spec, result)
+        await asyncio.to_thread(save_review, review_data)
+    return result, review_data, source
+
+
+async def generate(scope, receive, send):
+    """POST /generate with the same form fields and JSON response as the Flask view"""
+    try:
+        spec = parse_generate_form(parse_form(scope, await read_body(receive)))
+
+        (result, review_data, source), shared = await generate_coalescer.do(
+            spec_key(spec), lambda: generate_and_save(spec)
+        )
+
+        await send_json(send, generation_response(result, review_data, 'coalesced' if shared else source))
+
+    except Exception as e:
+        await send_json(send, {
+            'success': False,
+            'error': str(e)
+        })
+
+
+async def pooled_events(result):
+    yield "token", result['review']
+    yield "done", result
+
+
+async def generate_stream(scope, receive, send):
+    """POST /generate/stream: the Flask view's server-sent events, streamed from the event loop"""
+    try:
+        spec = parse_generate_form(parse_form(scope, await read_body(receive)))
+    except (TypeError, ValueError) as e:
+        await send_json(send, {'success': False, 'error': str(e)}, status=400)
+        return
+
+    pooled = await asyncio.to_thread(review_pool.take, spec)
+    if pooled is not None:
+        events, source = pooled_events(pooled), 'pool'
+    else:
+        events, source = review_generator.stream_review_async(**spec), 'stream'
+
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"text/event-stream; charset=utf-8"), (b"cache-control", b"no-cache"),
+                    (b"x-accel-buffering", b"no")],
+    })
+    try:
+        async for event, data in events:
+            if event == "token":
+                body = sse_event("token", {'text': data})
+            else:
+                review_data = None
+                if data['success']:
+                    review_data = build_review_record(spec, data)
+                    await asyncio.to_thread(save_review, review_data)
+                body = sse_event("done", generation_response(data, review_data, source))
+            await send({"type": "http.response.body", "body": body.encode("utf-8"), "more_body": True})
+    finally:
+        await events.aclose()
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await close_async_session()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+    elif scope["type"] == "http" and scope["path"] == "/generate" and scope["method"] == "POST":
+        await generate(scope, receive, send)
+    elif scope["type"] == "http" and scope["path"] == "/generate/stream" and scope["method"] == "POST":
+        await generate_stream(scope, receive, send)
+    else:
+        await wsgi_app(scope, receive, send)
@@ -0,0 +1,89 @@
+"""
+Micro-benchmark for prompt building in batch workloads.
+
+Compares the precompiled prompt path used by ReviewGenerator.build_prompt with
+rebuilding the whole prompt text on every call (what build_prompt used to do).
+
+    python benchmark_prompts.py --count 20000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+# Never touch the real history or need a real key for a benchmark
+os.environ.setdefault("REVIEWS_STORE_FILE", os.path.join(tempfile.mkdtemp(), "bench_reviews.jsonl"))
+os.environ.setdefault("SARVAM_API_KEY", "benchmark-placeholder-key")
+
+from advanced_review_generator import ReviewGenerator  # noqa: E402
+from prompt_templates import (  # noqa: E402
+    PROMPT_TEMPLATE, SENTIMENTS, LANGUAGES, USE_CASES, language_instruction
+)
+
+
+def make_specs(count):
+    return [
+        dict(
+            business_name=f"Business {i}",
+            business_type=random.choice(["shop", "restaurant", "clinic", "coaching centre"]),
+            category=random.choice(["Food & Beverage", "Healthcare", "Education"]),
+            star_rating=random.randint(1, 5),
+            language=random.choice(LANGUAGES),
+            use_case=random.choice(USE_CASES),
+        )
+        for i in range(count)
+    ]
+
+
+def time_per_call(fn, specs):
+    start = time.perf_counter()
+    for spec in specs:
+        fn(**spec)
+    return (time.perf_counter() - start) / len(specs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-prompt build cost")
+    parser.add_argument("--count", type=int, default=20000, help="prompts to build per variant")
+    args = parser.parse_args()
+
+    generator = ReviewGenerator()
+    specs = make_specs(args.count)
+
+    def rebuild_every_call(business_name, business_type, category, star_rating, language, use_case):
+        # Formats the full template per call, like the old f-string build_prompt
+        min_chars, max_chars = generator.get_unique_length_range()
+        recent = generator.history.recent(5)
+        avoid_openings = "\n".join(
+            [f"  * Don't start like: '{rev['review'][:30]}...'" for rev in recent if rev.get('review')]
+        )
+        return PROMPT_TEMPLATE.format(
+            use_case=use_case.lower(),
+            business_type=business_type,
+            business_name=business_name,
+            category=category,
+            star_rating=star_rating,
+            sentiment=SENTIMENTS.get(star_rating, SENTIMENTS[3]),
+            unique_structure=generator.get_unique_structure(),
+            avoid_openings=avoid_openings,
+            min_chars=min_chars,
+            max_chars=max_chars,
+            language_instruction=language_instruction(language)
+        )
+
+    rebuilt = time_per_call(rebuild_every_call, specs)
+    precompiled = time_per_call(generator.build_prompt, specs)
+
+    print("=" * 70)
+    print("            PROMPT BUILD BENCHMARK")
+    print("=" * 70)
+    print(f"  • Prompts per variant: {args.count}")
+    print(f"  • Rebuilt every call:  {rebuilt * 1e6:8.2f} µs/prompt ({1 / rebuilt:,.0f} prompts/sec)")
+    print(f"  • Precompiled:         {precompiled * 1e6:8.2f} µs/prompt ({1 / precompiled:,.0f} prompts/sec)")
+    print(f"  • Speedup:             {rebuilt / precompiled:8.2f}x")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
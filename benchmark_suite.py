@@ -0,0 +1,308 @@
+"""
+Reproducible benchmark suite for the generation, storage and export paths.
+
+Every history size runs in a fresh process against a local Sarvam stub and a
+synthetic review store, so results don't depend on reviews_history.jsonl or
+the network. Throughput, p50/p99 latency and peak RSS go to a JSON report.
+
+    python benchmark_suite.py                                   # 1k / 100k / 1M reviews
+    python benchmark_suite.py --sizes 1000,10000 --concurrency 1,8 --output bench.json
+    python benchmark_suite.py --sizes 100000 --compare bench.json   # exit 1 on regressions
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+WORDS = (
+    "staff friendly clean quick helpful visit time good nice caring room service food doctor teacher "
+    "class price waiting area parking booking call team simple easy calm busy small big fresh warm "
+    "place again family friend week morning evening answer question explain detail care help"
+).split()
+LANGUAGES = ("English", "Gujarati Romanized", "Hindi Romanized")
+USE_CASES = ("Customer review", "Student feedback", "Patient experience")
+
+# Requests per operation; heavy exports scale with history size, so they run fewer times
+OPERATION_REQUESTS = {'download_csv': 3, 'download_pdf': 10}
+
+
+def synthetic_review(i, rng, start):
+    return {
+        'id': '%032x' % rng.getrandbits(128),
+        'timestamp': (start + timedelta(seconds=i)).strftime('%Y-%m-%d %H:%M:%S'),
+        'business_name': f"Business {rng.randrange(1000)}",
+        'business_type': rng.choice(["shop", "restaurant", "clinic", "coaching centre"]),
+        'category': rng.choice(["Food & Beverage", "Healthcare", "Education", "Retail"]),
+        'star_rating': rng.randint(1, 5),
+        'language': rng.choice(LANGUAGES),
+        'use_case': rng.choice(USE_CASES),
+        'review': " ".join(rng.choice(WORDS) for _ in range(rng.randint(10, 45))).capitalize() + ".",
+        'char_count': 0,
+        'token_usage': {'prompt_tokens': 600, 'completion_tokens': 60, 'total_tokens': 660},
+        'method': 'api'
+    }
+
+
+def write_store(path, size, seed):
+    """Synthetic JSONL review store in the on-disk format of review_store"""
+    from review_store import encode_review
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(size):
+            review = synthetic_review(i, rng, start)
+            review['char_count'] = len(review['review'])
+            f.write(encode_review(review))
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def measure(fn, requests, concurrency):
+    """Run fn(i) `requests` times on `concurrency` threads; fn returns True on success"""
+    def one(i):
+        start = time.perf_counter()
+        try:
+            ok = fn(i)
+        except Exception:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(one, range(requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _ in results)
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))]
+
+    return {
+        'requests': requests,
+        'concurrency': concurrency,
+        'throughput': round(requests / elapsed, 2),
+        'p50_ms': round(pct(50) * 1000, 3),
+        'p99_ms': round(pct(99) * 1000, 3),
+        'errors': sum(1 for _, ok in results if not ok),
+    }
+
+
+def run_size(args):
+    """Child process: benchmark one history size, write the result JSON"""
+    random.seed(args.seed)
+    sys.path.insert(0, REPO_DIR)
+    write_start = time.perf_counter()
+    write_store(os.environ['REVIEWS_STORE_FILE'], args.size, args.seed)
+    write_seconds = time.perf_counter() - write_start
+
+    from sarvam_stub import start_stub
+    _, endpoint, _ = start_stub(latency=args.latency, error_rate=args.error_rate,
+                                response_chars=args.response_chars)
+    os.environ['SARVAM_API_ENDPOINT'] = endpoint
+
+    # Cold start: parse the store and build the id/filter indexes; similarity and
+    # search indexes finish in the background, measured operations start after that
+    load_start = time.perf_counter()
+    import app
+    load_seconds = time.perf_counter() - load_start
+    app.review_generator.similarity.ready.wait()
+    app.search_index.ready.wait()
+    index_seconds = time.perf_counter() - load_start
+
+    generator = app.review_generator
+    ids = [rid for rid in app.review_index.by_id]
+    rng = random.Random(args.seed)
+    business = app.load_reviews()[0]['business_name'] if args.size else "Business 0"
+
+    def spec(i):
+        return dict(business_name=f"Bench Business {i}", business_type="shop", category="Retail",
+                    star_rating=i % 5 + 1, language=LANGUAGES[i % 3], use_case=USE_CASES[i % 3])
+
+    def ok_json(response):
+        return response.status_code == 200 and response.get_json().get('success', True)
+
+    def drain(response):
+        for _ in response.response:
+            pass
+        response.close()
+        return response.status_code == 200
+
+    operations = {
+        'generate_review': lambda i: generator.generate_review(**spec(i))['success'],
+        'post_generate': lambda i: ok_json(app.app.test_client().post(
+            '/generate', data={k: str(v) for k, v in spec(i).items()})),
+        'api_reviews': lambda i: ok_json(app.app.test_client().get('/api/reviews?limit=50')),
+        'api_reviews_filtered': lambda i: ok_json(app.app.test_client().get(
+            f'/api/reviews?limit=50&business_name={business}')),
+        'api_stats': lambda i: ok_json(app.app.test_client().get('/api/stats')),
+        'api_search': lambda i: ok_json(app.app.test_client().get(
+            f'/api/reviews/search?q={WORDS[i % len(WORDS)]}+{WORDS[(i * 7 + 3) % len(WORDS)]}&limit=20')),
+        'history': lambda i: app.app.test_client().get('/history').status_code == 200,
+        'download_csv': lambda i: drain(app.app.test_client().get('/download/csv', buffered=False)),
+        # Fresh random selection each time so the PDF disk cache is never hit
+        'download_pdf': lambda i: app.app.test_client().get(
+            '/download/pdf?ids=' + ','.join(rng.sample(ids, min(20, len(ids))))).status_code == 200,
+    }
+
+    results = []
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for name, fn in operations.items():
+            if args.only and name not in args.only:
+                continue
+            for concurrency in args.concurrency:
+                requests = min(args.requests, OPERATION_REQUESTS.get(name, args.requests))
+                requests = max(requests, concurrency) if name not in OPERATION_REQUESTS else requests
+                results.append(dict(operation=name, **measure(fn, requests, concurrency)))
+
+    report = {
+        'size': args.size,
+        'store_write_seconds': round(write_seconds, 3),
+        'cold_start_seconds': round(load_seconds, 3),
+        'index_build_seconds': round(index_seconds, 3),
+        'peak_rss_mb': peak_rss_mb(),
+        'operations': results,
+    }
+    with open(args.result_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f)
+
+
+def run_child(size, args):
+    workdir = tempfile.mkdtemp(prefix=f"bench_{size}_")
+    result_file = os.path.join(workdir, "result.json")
+    env = dict(os.environ)
+    env.update(
+        REVIEWS_STORE_FILE=os.path.join(workdir, "reviews.jsonl"),
+        SARVAM_RATE_STATE_FILE=os.path.join(workdir, "rate_limit.json"),
+        PDF_CACHE_DIR=os.path.join(workdir, "pdf_exports"),
+        SARVAM_API_KEY=env.get("SARVAM_API_KEY") or "benchmark-placeholder-key",
+        # Measure our code paths, not the client-side budget
+        SARVAM_REQUESTS_PER_SECOND="0",
+        SARVAM_TOKENS_PER_MINUTE="0",
+        REVIEW_POOL_SIZE="0",
+        REVIEW_POOL_FILE="",
+    )
+    command = [
+        sys.executable, os.path.abspath(__file__), "--child", "--size", str(size),
+        "--result-file", result_file, "--seed", str(args.seed),
+        "--requests", str(args.requests), "--concurrency", ",".join(map(str, args.concurrency)),
+        "--latency", str(args.latency), "--error-rate", str(args.error_rate),
+        "--response-chars", str(args.response_chars),
+    ]
+    if args.only:
+        command += ["--only", ",".join(args.only)]
+    # cwd is the scratch dir so nothing (legacy migration, PDF cache) touches the repo
+    subprocess.run(command, env=env, cwd=workdir, check=True)
+    with open(result_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(report, baseline_path, tolerance):
+    """Operations whose p50 latency or throughput got worse than the baseline by > tolerance"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {
+        (run['size'], op['operation'], op['concurrency']): op
+        for run in baseline['runs'] for op in run['operations']
+    }
+    regressions = []
+    for run in report['runs']:
+        for op in run['operations']:
+            old = previous.get((run['size'], op['operation'], op['concurrency']))
+            if old is None:
+                continue
+            if op['p50_ms'] > old['p50_ms'] * (1 + tolerance) or op['throughput'] < old['throughput'] * (1 - tolerance):
+                regressions.append((run['size'], op, old))
+    return regressions
+
+
+def print_report(report):
+    print("=" * 86)
+    print("                         BENCHMARK SUITE")
+    print("=" * 86)
+    for run in report['runs']:
+        print(f"\n📊 {run['size']:,} reviews  (cold start {run['cold_start_seconds']}s, "
+              f"indexes ready {run['index_build_seconds']}s, peak RSS {run['peak_rss_mb']} MB)")
+        print(f"  {'operation':<22}{'conc':>5}{'req':>6}{'req/s':>10}{'p50 ms':>11}{'p99 ms':>11}{'errors':>8}")
+        for op in run['operations']:
+            print(f"  {op['operation']:<22}{op['concurrency']:>5}{op['requests']:>6}{op['throughput']:>10}"
+                  f"{op['p50_ms']:>11}{op['p99_ms']:>11}{op['errors']:>8}")
+    print("=" * 86)
+
+
+def int_list(text):
+    return [int(part) for part in text.split(",") if part]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark generation, storage and export paths")
+    parser.add_argument("--sizes", type=int_list, default=[1000, 100000, 1000000], help="history sizes")
+    parser.add_argument("--concurrency", type=int_list, default=[1, 8, 32], help="concurrency levels")
+    parser.add_argument("--requests", type=int, default=50, help="requests per operation and level")
+    parser.add_argument("--latency", type=float, default=0.05, help="stub seconds per Sarvam call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of stub calls that fail")
+    parser.add_argument("--response-chars", type=int, default=250, help="stub review length")
+    parser.add_argument("--only", type=lambda text: text.split(","), help="comma-separated operations")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", metavar="JSON", help="baseline report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_size(args)
+        return
+
+    report = {
+        'created': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'python': sys.version.split()[0],
+        'config': {
+            'sizes': args.sizes, 'concurrency': args.concurrency, 'requests': args.requests,
+            'latency': args.latency, 'error_rate': args.error_rate,
+            'response_chars': args.response_chars, 'seed': args.seed,
+        },
+        'runs': [],
+    }
+    for size in args.sizes:
+        print(f"🔄 Benchmarking {size:,} reviews...")
+        report['runs'].append(run_child(size, args))
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print_report(report)
+    print(f"\n✅ Report written to {args.output}")
+
+    if args.compare:
+        regressions = compare(report, args.compare, args.tolerance)
+        for size, op, old in regressions:
+            print(f"❌ {size:,} reviews, {op['operation']} x{op['concurrency']}: "
+                  f"p50 {old['p50_ms']} -> {op['p50_ms']} ms, {old['throughput']} -> {op['throughput']} req/s")
+        if regressions:
+            sys.exit(1)
+        print(f"✅ No regressions beyond {args.tolerance:.0%} against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Non-interactive bulk generation.
+
+Reads review specs from a CSV or JSONL file, generates them concurrently and
+appends one JSON line per spec to the output file as each one finishes.
+The output file is also the checkpoint: running the same command again skips
+specs that already have a successful result, so an interrupted run resumes
+where it stopped. Failed specs are tried again on the next run.
+
+    python advanced_review_generator.py bulk specs.csv --output reviews.jsonl --concurrency 8
+
+Spec columns / keys: business_name, business_type, category, star_rating and
+optionally language, use_case, min_chars, max_chars.
+"""
+import csv
+import json
+import os
+import time
+
+REQUIRED_FIELDS = ('business_name', 'business_type', 'category', 'star_rating')
+
+# Progress line every N finished specs
+PROGRESS_EVERY = 50
+
+
+def parse_spec(raw, line_number):
+    """Validate one row into generate_review() keyword arguments (ValueError on bad rows)"""
+    raw = {key.strip(): value for key, value in raw.items() if key and value not in (None, '')}
+    missing = [field for field in REQUIRED_FIELDS if not str(raw.get(field, '')).strip()]
+    if missing:
+        raise ValueError(f"line {line_number}: missing {', '.join(missing)}")
+
+    try:
+        spec = {
+            'business_name': str(raw['business_name']).strip(),
+            'business_type': str(raw['business_type']).strip(),
+            'category': str(raw['category']).strip(),
+            'star_rating': int(raw['star_rating']),
+            'language': str(raw.get('language') or 'English').strip(),
+            'use_case': str(raw.get('use_case') or 'Customer review').strip()
+        }
+        if 'min_chars' in raw or 'max_chars' in raw:
+            spec['min_chars'] = int(raw['min_chars'])
+            spec['max_chars'] = int(raw['max_chars'])
+    except (KeyError, ValueError) as e:
+        raise ValueError(f"line {line_number}: invalid value ({e})")
+
+    if not 1 <= spec['star_rating'] <= 5:
+        raise ValueError(f"line {line_number}: star_rating must be between 1 and 5")
+    return spec
+
+
+def read_specs(path):
+    """Read all specs from a .csv (header row) or .jsonl file"""
+    specs = []
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if path.lower().endswith('.csv'):
+            # Header is line 1
+            for line_number, row in enumerate(csv.DictReader(f), start=2):
+                specs.append(parse_spec(row, line_number))
+        else:
+            for line_number, line in enumerate(f, start=1):
+                if line.strip():
+                    specs.append(parse_spec(json.loads(line), line_number))
+    return specs
+
+
+def load_checkpoint(path):
+    """
+    Map spec index -> spec for every successful result already in the output file.
+    A torn last line from an interrupted write is cut off so appends stay valid JSONL.
+    """
+    finished = {}
+    if not os.path.exists(path):
+        return finished
+
+    with open(path, 'rb+') as f:
+        data = f.read()
+        end = data.rfind(b'\n') + 1
+        if end < len(data):
+            f.truncate(end)
+
+    for line in data[:end].splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if record.get('success'):
+            finished[record['index']] = record['spec']
+    return finished
+
+
+def run_bulk(generator, specs_path, output_path, concurrency):
+    """Generate every unfinished spec, appending results to output_path; returns a summary dict"""
+    specs = read_specs(specs_path)
+    finished = load_checkpoint(output_path)
+    # A spec counts as done only if the same row is recorded, so an edited input is redone
+    pending = [(index, spec) for index, spec in enumerate(specs) if finished.get(index) != spec]
+
+    summary = {
+        'total': len(specs),
+        'skipped': len(specs) - len(pending),
+        'succeeded': 0,
+        'failed': 0
+    }
+    print(f"📄 {summary['total']} specs, {summary['skipped']} already done, "
+          f"{len(pending)} to generate ({concurrency} at a time)")
+
+    start = time.time()
+    with open(output_path, 'a', encoding='utf-8') as out:
+        results = generator.generate_batch((spec for _, spec in pending), concurrency=concurrency)
+        for done, (position, spec, result) in enumerate(results, start=1):
+            record = {'index': pending[position][0], 'spec': spec}
+            record.update(result)
+            out.write(json.dumps(record, ensure_ascii=False) + '\n')
+            out.flush()
+
+            summary['succeeded' if result['success'] else 'failed'] += 1
+            if done % PROGRESS_EVERY == 0 or done == len(pending):
+                rate = done / max(time.time() - start, 1e-9)
+                print(f"  • {done}/{len(pending)} done ({summary['failed']} failed, {rate:.1f}/s)")
+
+    return summary
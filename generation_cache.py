@@ -0,0 +1,404 @@
+import asyncio
+import atexit
+import itertools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from file_lock import hold_file_lock
+from similarity_index import get_similarity_index, shingles, jaccard, SIMILARITY_THRESHOLD
+
+# Pre-generated reviews kept ready per spec; 0 disables the pool (opt-in)
+REVIEW_POOL_SIZE = int(os.getenv("REVIEW_POOL_SIZE", "0"))
+
+# Seconds a pooled review may wait before it is considered stale
+REVIEW_POOL_TTL = float(os.getenv("REVIEW_POOL_TTL", "300"))
+
+# The same for warmed (pinned) specs; 0 = never, so they are not regenerated
+# without demand and survive restarts. take() still rejects near-duplicates.
+REVIEW_POOL_PINNED_TTL = float(os.getenv("REVIEW_POOL_PINNED_TTL", "0"))
+
+# Specs with a pool; the least recently requested one is dropped first
+REVIEW_POOL_MAX_SPECS = int(os.getenv("REVIEW_POOL_MAX_SPECS", "128"))
+
+# Background threads topping pools up
+REVIEW_POOL_WORKERS = int(os.getenv("REVIEW_POOL_WORKERS", "2"))
+
+# Snapshot of the pool, reloaded on start ("" keeps it in memory only).
+# Each worker writes its own numbered copy (review_pool.0.json, ...)
+REVIEW_POOL_FILE = os.getenv("REVIEW_POOL_FILE", "review_pool.json")
+
+# JSON array of specs to keep warm before anyone asks for them
+REVIEW_POOL_SPECS_FILE = os.getenv("REVIEW_POOL_SPECS_FILE", "")
+
+# Seconds between expiry sweeps / pinned refill retries / snapshots
+REVIEW_POOL_FLUSH_INTERVAL = float(os.getenv("REVIEW_POOL_FLUSH_INTERVAL", "2"))
+
+# Seconds before a spec whose refill failed is tried again
+REVIEW_POOL_RETRY_DELAY = float(os.getenv("REVIEW_POOL_RETRY_DELAY", "30"))
+
+# Refill throughput is reported over this many seconds
+THROUGHPUT_WINDOW = 300
+
+# Fields that make two generation requests identical
+SPEC_FIELDS = ('business_name', 'business_type', 'category', 'star_rating', 'language', 'use_case')
+
+
+def spec_key(spec):
+    """Hashable, case-insensitive key of a generation spec"""
+    return tuple(str(spec.get(field, '')).strip().lower() for field in SPEC_FIELDS)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Concurrent calls with the same key share one execution and its result"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def do(self, key, fn):
+        """Run fn() once per key at a time; returns (result, shared)"""
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+        return call.result, False
+
+
+class AsyncSingleFlight:
+    """SingleFlight for coroutines running on one event loop"""
+
+    def __init__(self):
+        self.calls = {}
+
+    async def do(self, key, make_coro):
+        """Await make_coro() once per key at a time; returns (result, shared)
+
+        If the leader is cancelled (its client went away) the followers do not
+        inherit the CancelledError: the first of them takes over the call.
+        """
+        future = self.calls.get(key)
+        while future is not None:
+            try:
+                return await asyncio.shield(future), True
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise  # this follower itself was cancelled
+            future = self.calls.get(key)
+
+        future = self.calls[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await make_coro()
+            future.set_result(result)
+            return result, False
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved; followers still get it raised
+            raise
+        finally:
+            del self.calls[key]
+            if not future.done():
+                future.cancel()  # the leader itself was cancelled
+
+
+class ReviewPool:
+    """LRU of pre-generated reviews per spec, refilled by background workers
+
+    take() hands out an unused review immediately and schedules a refill, so
+    popular specs skip the Sarvam round trip. Specs passed to warm() are
+    pinned and kept full ahead of demand; other specs are only topped up by
+    take() and dropped once nobody asked for them within the TTL.
+
+    The pool is snapshotted so a restart does not throw it away. Every worker
+    holds its own snapshot slot (a lock kept for the life of the process), so
+    no two live workers ever restore and hand out the same pooled review; a
+    replacement worker picks up the slot of the one that died.
+
+    Pooled reviews are re-checked against the history when served, since
+    reviews saved after they were generated (also by other workers sharing
+    the store) may now be near-duplicates.
+    """
+
+    def __init__(self, generate, size=REVIEW_POOL_SIZE, ttl=REVIEW_POOL_TTL,
+                 max_specs=REVIEW_POOL_MAX_SPECS, workers=REVIEW_POOL_WORKERS, path=REVIEW_POOL_FILE,
+                 pinned_ttl=REVIEW_POOL_PINNED_TTL):
+        self.generate = generate  # spec -> generate_review() result
+        self.size = size
+        self.ttl = ttl
+        self.pinned_ttl = pinned_ttl
+        self.max_specs = max_specs
+        self.path = path
+        self.snapshot_path = None
+        self.slot_fd = None
+        self.lock = threading.Lock()
+        self.pools = OrderedDict()  # spec key -> deque of (created, result)
+        self.specs = {}
+        self.last_used = {}
+        self.pinned = set()
+        self.refilling = set()
+        self.failed_at = {}
+        self.counters = {'hits': 0, 'misses': 0, 'generated': 0, 'rejected': 0, 'failures': 0}
+        self.generated_at = deque(maxlen=10000)
+        self.dirty = False
+        self.executor = None
+        self.similarity = None
+        if self.enabled:
+            self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="review-pool")
+            self.similarity = get_similarity_index()
+            if self.path:
+                self.snapshot_path = self._claim_slot()
+            self.load()
+            threading.Thread(target=self._maintain, name="review-pool-maintain", daemon=True).start()
+            atexit.register(self.save)
+
+    @property
+    def enabled(self):
+        return self.size > 0
+
+    def _claim_slot(self):
+        """Lock the first snapshot slot no live worker holds; returns its snapshot path"""
+        base, ext = os.path.splitext(self.path)
+        for slot in itertools.count():
+            snapshot_path = f"{base}.{slot}{ext or '.json'}"
+            fd = hold_file_lock(snapshot_path + ".lock")
+            if fd is not None:
+                self.slot_fd = fd
+                return snapshot_path
+
+    def _track(self, key, spec):
+        """Register or touch a spec; caller holds the lock"""
+        self.last_used[key] = time.time()
+        if key in self.pools:
+            self.pools.move_to_end(key)
+            return
+        self.pools[key] = deque()
+        self.specs[key] = dict(spec)
+        for evicted in list(self.pools):
+            if len(self.pools) <= self.max_specs:
+                break
+            if evicted not in self.pinned:
+                self._drop(evicted)
+
+    def _expired(self, key, created, now):
+        """Whether a review pooled at `created` is too old for key; caller holds the lock"""
+        ttl = self.pinned_ttl if key in self.pinned else self.ttl
+        return ttl > 0 and now - created > ttl
+
+    def _drop(self, key):
+        """Forget a spec and its pooled reviews; caller holds the lock"""
+        self.pools.pop(key, None)
+        self.specs.pop(key, None)
+        self.last_used.pop(key, None)
+        self.failed_at.pop(key, None)
+        self.dirty = True
+
+    def warm(self, spec):
+        """Keep spec's pool full ahead of demand"""
+        if not self.enabled:
+            return
+        key = spec_key(spec)
+        with self.lock:
+            self.pinned.add(key)
+            self._track(key, spec)
+        self.schedule_refill(key)
+
+    def take(self, spec):
+        """Pop a fresh pooled result for spec (None on a miss) and top the pool up"""
+        if not self.enabled:
+            return None
+        key = spec_key(spec)
+        with self.lock:
+            self._track(key, spec)
+
+        result = None
+        while result is None:
+            with self.lock:
+                pool = self.pools.get(key)
+                if not pool:
+                    break
+                created, candidate = pool.popleft()
+                self.dirty = True
+                expired = self._expired(key, created, time.time())
+            if expired:
+                continue
+            if self.similarity.is_duplicate(candidate['review']):
+                continue
+            result = candidate
+
+        with self.lock:
+            self.counters['hits' if result is not None else 'misses'] += 1
+        self.schedule_refill(key)
+        return result
+
+    def schedule_refill(self, key):
+        with self.lock:
+            pool = self.pools.get(key)
+            if pool is None or key in self.refilling or len(pool) >= self.size:
+                return
+            self.refilling.add(key)
+            spec = self.specs[key]
+        self.executor.submit(self._refill, key, spec)
+
+    def _refill(self, key, spec):
+        rejected = 0
+        try:
+            while rejected < self.size:
+                with self.lock:
+                    pool = self.pools.get(key)
+                    if pool is None or len(pool) >= self.size:
+                        return
+                    pooled = [shingles(result['review']) for _, result in pool]
+                result = self.generate(spec)
+                if not result.get('success'):
+                    with self.lock:
+                        self.counters['failures'] += 1
+                        self.failed_at[key] = time.time()
+                    return  # the maintenance loop tries again later
+                # generate_review checked the history; pooled siblings must differ too
+                candidate = shingles(result['review'])
+                if any(jaccard(candidate, other) >= SIMILARITY_THRESHOLD for other in pooled):
+                    rejected += 1
+                    with self.lock:
+                        self.counters['rejected'] += 1
+                    continue
+                with self.lock:
+                    pool = self.pools.get(key)
+                    if pool is None:
+                        return
+                    pool.append((time.time(), result))
+                    self.counters['generated'] += 1
+                    self.generated_at.append(time.time())
+                    self.dirty = True
+        except Exception as e:
+            with self.lock:
+                self.counters['failures'] += 1
+                self.failed_at[key] = time.time()
+            print(f"⚠️ Review pool refill failed: {e}")
+        finally:
+            with self.lock:
+                self.refilling.discard(key)
+
+    def _maintain(self):
+        """Drop expired reviews and idle specs, keep pinned specs full and snapshot the pool
+
+        Only pinned specs are refilled here; unpinned ones are topped up by
+        take(), so nothing is generated for specs nobody asks for any more.
+        Pinned reviews follow pinned_ttl, so by default they are kept until served.
+        """
+        while True:
+            time.sleep(REVIEW_POOL_FLUSH_INTERVAL)
+            now = time.time()
+            cutoff = now - self.ttl
+            with self.lock:
+                for key, pool in self.pools.items():
+                    while pool and self._expired(key, pool[0][0], now):
+                        pool.popleft()
+                        self.dirty = True
+                for key in [key for key in self.pools if key not in self.pinned]:
+                    if self.last_used.get(key, 0) < cutoff:
+                        self._drop(key)
+                retry_after = time.time() - REVIEW_POOL_RETRY_DELAY
+                keys = [key for key in self.pinned if self.failed_at.get(key, 0) < retry_after]
+            for key in keys:
+                self.schedule_refill(key)
+            if self.dirty:
+                self.save()
+
+    def save(self):
+        """Atomically write this worker's pool snapshot"""
+        if not self.snapshot_path:
+            return
+        with self.lock:
+            snapshot = [
+                {'spec': self.specs[key], 'pinned': key in self.pinned,
+                 'reviews': [{'created': created, 'result': result} for created, result in pool]}
+                for key, pool in self.pools.items()
+            ]
+            self.dirty = False
+        try:
+            # Nobody else writes this slot while we hold it
+            tmp_path = self.snapshot_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            print(f"⚠️ Could not save review pool: {e}")
+
+    def load(self):
+        """Restore unexpired reviews (pinned_ttl for pinned specs) from this worker's snapshot"""
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not load review pool: {e}")
+            return
+        now = time.time()
+        with self.lock:
+            for entry in snapshot:
+                key = spec_key(entry['spec'])
+                if entry.get('pinned'):
+                    self.pinned.add(key)
+                self._track(key, entry['spec'])
+                pool = self.pools[key]
+                for item in entry['reviews']:
+                    if not self._expired(key, item['created'], now) and len(pool) < self.size:
+                        pool.append((item['created'], item['result']))
+            pinned = list(self.pinned)
+        for key in pinned:
+            self.schedule_refill(key)
+
+    def status(self):
+        """Fill levels and refill throughput for /api/pool"""
+        now = time.time()
+        with self.lock:
+            recent = sum(1 for at in self.generated_at if now - at <= THROUGHPUT_WINDOW)
+            return {
+                'enabled': self.enabled,
+                'target_size': self.size,
+                'ttl_seconds': self.ttl,
+                'pinned_ttl_seconds': self.pinned_ttl,
+                'specs': [
+                    {'spec': self.specs[key], 'ready': len(pool), 'pinned': key in self.pinned,
+                     'refilling': key in self.refilling}
+                    for key, pool in self.pools.items()
+                ],
+                'ready_total': sum(len(pool) for pool in self.pools.values()),
+                'refill_per_minute': recent * 60.0 / THROUGHPUT_WINDOW,
+                **self.counters
+            }
+
+
+def load_warm_specs(path=REVIEW_POOL_SPECS_FILE):
+    """Specs listed in the REVIEW_POOL_SPECS_FILE JSON array (empty if unset)"""
+    if not path:
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
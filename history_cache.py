@@ -0,0 +1,169 @@
+import os
+import threading
+from review_store import ReviewStore, REVIEWS_STORE_FILE, new_review_id
+from metrics import HISTORY_WRITE_SECONDS
+
+
+class HistoryCache:
+    """In-memory copy of the review store, revalidated cheaply with os.stat
+
+    The store is append-only, so when the file grows only the new tail is parsed.
+    Derived indexes can subscribe and are fed every review exactly once.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.reviews = []
+        self.offset = 0          # bytes of the store file already parsed
+        self.stat_key = None     # (inode, size, mtime_ns) at the last revalidation
+        self.indexes = []
+        self.lock = threading.RLock()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.store.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def _add(self, review):
+        seq = len(self.reviews)
+        self.reviews.append(review)
+        for index in self.indexes:
+            index.add(seq, review)
+
+    def _reset(self):
+        self.reviews = []
+        self.offset = 0
+        for index in self.indexes:
+            index.clear()
+
+    def subscribe(self, index, background=False):
+        """Attach an index exposing add(seq, review) and clear(); it is back-filled first
+
+        With background=True the back-fill runs in a thread so a worker can start
+        serving right away; returns a threading.Event set once the index is attached
+        and complete (already set for a foreground subscribe).
+        """
+        ready = threading.Event()
+        if background:
+            threading.Thread(target=self._backfill, args=(index, ready),
+                             name=f"backfill-{type(index).__name__}", daemon=True).start()
+            return ready
+        with self.lock:
+            self.refresh()
+            for seq, review in enumerate(self.reviews):
+                index.add(seq, review)
+            self.indexes.append(index)
+        ready.set()
+        return ready
+
+    def _backfill(self, index, ready):
+        """Feed a snapshot of the reviews to index without the lock, then catch up and attach it"""
+        try:
+            while True:
+                with self.lock:
+                    self.refresh()
+                    reviews = self.reviews
+                    count = len(reviews)
+                for seq in range(count):
+                    index.add(seq, reviews[seq])
+
+                with self.lock:
+                    self.refresh()
+                    if self.reviews is reviews:
+                        for seq in range(count, len(reviews)):
+                            index.add(seq, reviews[seq])
+                        self.indexes.append(index)
+                        ready.set()
+                        return
+                # The store was replaced while we were indexing: start over
+                index.clear()
+        except Exception as e:
+            print(f"⚠️ Building {type(index).__name__} failed: {e}")
+
+    def refresh(self):
+        """Parse whatever was appended to the store since the last call"""
+        key = self._stat()
+        if key == self.stat_key:
+            return
+
+        with self.lock:
+            key = self._stat()
+            if key == self.stat_key:
+                return
+
+            if key is None:
+                if self.reviews:
+                    self._reset()
+                self.stat_key = None
+                return
+
+            # File replaced or truncated behind our back: start over
+            replaced = self.stat_key is not None and key[0] != self.stat_key[0]
+            if replaced or key[1] < self.offset:
+                self._reset()
+
+            for end, review in self.store.iter_from(self.offset):
+                self._add(review)
+                self.offset = end
+            self.stat_key = key
+
+    def append(self, review_data):
+        """Save one review to the store and add it to the cache without re-reading"""
+        self.append_many([review_data])
+
+    def append_many(self, reviews):
+        """Save several reviews with one store write and update the cache incrementally"""
+        for review in reviews:
+            review.setdefault('id', new_review_id())
+        with HISTORY_WRITE_SECONDS.time():
+            start, end = self.store.append_many(reviews)
+
+        with self.lock:
+            if start == self.offset:
+                for review in reviews:
+                    self._add(review)
+                self.offset = end
+                # stat_key is left stale on purpose so the next refresh()
+                # still picks up anything another worker appended after us
+            else:
+                self.refresh()
+
+    def all(self):
+        """Return every review, oldest first"""
+        self.refresh()
+        with self.lock:
+            return list(self.reviews)
+
+    def get(self, seq):
+        """Return the review at store position seq, or None"""
+        self.refresh()
+        with self.lock:
+            if 0 <= seq < len(self.reviews):
+                return self.reviews[seq]
+        return None
+
+    def recent(self, count):
+        """Return the last `count` reviews, oldest first"""
+        self.refresh()
+        with self.lock:
+            return self.reviews[-count:] if count else []
+
+    def __len__(self):
+        self.refresh()
+        return len(self.reviews)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_history_cache(path=REVIEWS_STORE_FILE):
+    """Return the process-wide history cache for a store file"""
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = HistoryCache(ReviewStore(path))
+            _caches[path] = cache
+        return cache
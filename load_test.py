@@ -0,0 +1,158 @@
+"""
+Load test: gunicorn sync workers (Procfile) vs the ASGI entry point (asgi.py).
+
+Starts a latency-injecting Sarvam stub, boots each server against it with a
+throwaway review store, fires concurrent POST /generate requests and reports
+throughput and latency percentiles.
+
+    python load_test.py --requests 200 --concurrency 200 --latency 0.5
+    python load_test.py --mode async --requests 1000 --concurrency 500
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+
+from sarvam_stub import start_stub
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def server_command(mode, port, sync_workers):
+    if mode == "sync":
+        return [sys.executable, "-m", "gunicorn", "app:app", "--bind", f"127.0.0.1:{port}",
+                "--workers", str(sync_workers), "--timeout", "120", "--log-level", "warning"]
+    return [sys.executable, "-m", "uvicorn", "asgi:app", "--port", str(port), "--log-level", "warning"]
+
+
+def server_env(endpoint, workdir):
+    env = dict(os.environ)
+    env.update(
+        SARVAM_API_ENDPOINT=endpoint,
+        SARVAM_API_KEY=env.get("SARVAM_API_KEY") or "load-test-placeholder-key",
+        REVIEWS_STORE_FILE=os.path.join(workdir, "reviews.jsonl"),
+        SARVAM_RATE_STATE_FILE=os.path.join(workdir, "rate_limit.json"),
+        # Measure the serving path, not the client-side budget or duplicate retries
+        SARVAM_REQUESTS_PER_SECOND="0",
+        SARVAM_TOKENS_PER_MINUTE="0",
+        SIMILARITY_THRESHOLD="1.01",
+        REVIEW_POOL_SIZE="0",
+        REVIEW_POOL_FILE="",
+        PYTHONUNBUFFERED="1",
+    )
+    return env
+
+
+async def wait_ready(base_url, timeout=30):
+    deadline = time.time() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.time() < deadline:
+            try:
+                async with session.get(f"{base_url}/health") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"server at {base_url} did not start")
+
+
+async def fire(base_url, total, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, failures = [], 0
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=300)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        async def one(i):
+            nonlocal failures
+            form = {
+                # Distinct businesses so request coalescing does not merge them
+                'business_name': f"Load Test {i}", 'business_type': 'shop', 'category': 'Retail',
+                'star_rating': '4', 'language': 'English', 'use_case': 'Customer review'
+            }
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    async with session.post(f"{base_url}/generate", data=form) as response:
+                        ok = response.status == 200 and (await response.json()).get('success')
+                except aiohttp.ClientError:
+                    ok = False
+                latencies.append(time.perf_counter() - start)
+                if not ok:
+                    failures += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))]
+
+    return {
+        'elapsed': elapsed, 'throughput': total / elapsed, 'failures': failures,
+        'p50': pct(50), 'p95': pct(95), 'p99': pct(99)
+    }
+
+
+def run(mode, endpoint, args):
+    port = free_port()
+    workdir = tempfile.mkdtemp(prefix=f"load_{mode}_")
+    process = subprocess.Popen(server_command(mode, port, args.sync_workers),
+                               env=server_env(endpoint, workdir),
+                               cwd=os.path.dirname(os.path.abspath(__file__)))
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        asyncio.run(wait_ready(base_url))
+        return asyncio.run(fire(base_url, args.requests, args.concurrency))
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync vs async /generate throughput against a stub")
+    parser.add_argument("--mode", choices=["sync", "async", "both"], default="both")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.2, help="stub seconds per Sarvam call")
+    parser.add_argument("--sync-workers", type=int, default=1, help="gunicorn workers (Procfile default: 1)")
+    args = parser.parse_args()
+
+    server, endpoint, stub = start_stub(latency=args.latency)
+    modes = ["sync", "async"] if args.mode == "both" else [args.mode]
+    results = {}
+    for mode in modes:
+        print(f"🔄 {mode}: {args.requests} requests, {args.concurrency} concurrent, "
+              f"{args.latency:g}s upstream latency...")
+        results[mode] = run(mode, endpoint, args)
+
+    print("\n" + "=" * 70)
+    print("            /generate LOAD TEST")
+    print("=" * 70)
+    for mode, stats in results.items():
+        print(f"\n📊 {mode.upper()} ({'gunicorn sync' if mode == 'sync' else 'uvicorn asgi'}):")
+        print(f"  • Throughput: {stats['throughput']:.1f} req/s ({stats['elapsed']:.2f}s total)")
+        print(f"  • Latency p50/p95/p99: {stats['p50']:.3f}s / {stats['p95']:.3f}s / {stats['p99']:.3f}s")
+        print(f"  • Failures: {stats['failures']}")
+    if len(results) == 2:
+        print(f"\n✅ Async speedup: {results['async']['throughput'] / results['sync']['throughput']:.1f}x")
+    print(f"  • Upstream calls served by stub: {stub.requests}")
+    print("=" * 70)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from in-process work (prompt build) to Sarvam round trips
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_registry = []
+
+
+def _label_text(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    """Monotonic counter, optionally split by labels"""
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(label, '')) for label in self.labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_label_text(self.labels, key)} {value}")
+        return lines
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; observe() is a bisect and two additions"""
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.series = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self.lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(label, '')) for label in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with-block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            snapshot = {key: list(series) for key, series in self.series.items()}
+        for key, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_label_text(self.labels, key, ('le', bound))} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(self.labels, key)} {series[-1]}")
+            lines.append(f"{self.name}_count{_label_text(self.labels, key)} {cumulative}")
+        return lines
+
+
+def render():
+    """All metrics of this process in the Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.collect())
+    return "\n".join(lines) + "\n"
+
+
+# Generation pipeline
+PROMPT_BUILD_SECONDS = Histogram(
+    "review_prompt_build_seconds", "Time to build the generation prompt")
+RATE_LIMIT_WAIT_SECONDS = Histogram(
+    "sarvam_rate_limit_wait_seconds", "Time spent waiting for client-side rate limit budget")
+UPSTREAM_SECONDS = Histogram(
+    "sarvam_request_seconds", "Sarvam AI chat-completions latency per attempt", labels=("mode",))
+POSTPROCESS_SECONDS = Histogram(
+    "review_postprocess_seconds", "Cleaning, trimming and similarity check of a completion")
+HISTORY_WRITE_SECONDS = Histogram(
+    "review_history_write_seconds", "Time to append reviews to the review store")
+EXPORT_RENDER_SECONDS = Histogram(
+    "review_export_render_seconds", "Time spent rendering an export", labels=("format",))
+
+UPSTREAM_REQUESTS = Counter(
+    "sarvam_requests_total", "Sarvam AI calls by outcome and HTTP status", labels=("outcome", "status"))
+RULE_VIOLATIONS = Counter(
+    "review_rule_violations_total", "Prompt rule violations by rule and what was done (repaired, regenerated, kept)",
+    labels=("rule", "outcome"))
+REPAIRED_COMPLETIONS = Counter(
+    "review_repaired_completions_total", "Completions fixed locally that would otherwise have been regenerated")
+TOKENS = Counter(
+    "sarvam_tokens_total", "Tokens reported by Sarvam AI usage", labels=("kind",))
+
+
+def record_response(status_code):
+    """Count an upstream reply by status"""
+    UPSTREAM_REQUESTS.inc(outcome='success' if status_code == 200 else 'error', status=status_code)
+
+
+def record_failure(outcome):
+    """Count an upstream call that got no reply (timeout, connection_error, rate_limited)"""
+    UPSTREAM_REQUESTS.inc(outcome=outcome)
+
+
+def record_usage(usage):
+    for kind, value in (usage or {}).items():
+        if isinstance(value, (int, float)):
+            TOKENS.inc(value, kind=kind)
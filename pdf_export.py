@@ -0,0 +1,213 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from io import BytesIO
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.lib import colors
+from metrics import EXPORT_RENDER_SECONDS
+
+# Finished PDFs and job status files, shared by every gunicorn worker.
+# Absolute, because Flask's send_file resolves relative paths against the app
+# directory rather than the working directory the files were written in.
+PDF_CACHE_DIR = os.path.abspath(os.getenv("PDF_CACHE_DIR", "pdf_exports"))
+PDF_CACHE_MAX_FILES = int(os.getenv("PDF_CACHE_MAX_FILES", "50"))
+
+# Background renders for POST /download/pdf/jobs
+PDF_EXPORT_WORKERS = int(os.getenv("PDF_EXPORT_WORKERS", "2"))
+
+# A queued/running job not finished after this long is assumed lost (worker restarted)
+PDF_JOB_TIMEOUT = int(os.getenv("PDF_JOB_TIMEOUT", "600"))
+
+# Styles are built once at import instead of per request / per review
+STYLES = getSampleStyleSheet()
+TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=STYLES['Heading1'],
+    fontSize=24,
+    textColor=colors.HexColor('#667eea'),
+    spaceAfter=30,
+    alignment=1
+)
+HEADING_STYLE = ParagraphStyle(
+    'CustomHeading',
+    parent=STYLES['Heading2'],
+    fontSize=14,
+    textColor=colors.HexColor('#764ba2'),
+    spaceAfter=12,
+    spaceBefore=12
+)
+NORMAL_STYLE = STYLES['Normal']
+INFO_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f0f0f0')),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ('TOPPADDING', (0, 0), (-1, -1), 8),
+    ('GRID', (0, 0), (-1, -1), 1, colors.grey)
+])
+
+_executor = ThreadPoolExecutor(max_workers=PDF_EXPORT_WORKERS, thread_name_prefix="pdf-export")
+
+
+def render_pdf(reviews):
+    """Render reviews into PDF bytes"""
+    started = time.perf_counter()
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=18)
+
+    # Container for PDF elements
+    elements = []
+
+    # Title
+    elements.append(Paragraph("AI Review Generator - Export Report", TITLE_STYLE))
+    elements.append(Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", NORMAL_STYLE))
+    elements.append(Paragraph(f"Total Reviews: {len(reviews)}", NORMAL_STYLE))
+    elements.append(Spacer(1, 0.3*inch))
+
+    # Add each review
+    for idx, review in enumerate(reviews, 1):
+        # Review header
+        elements.append(Paragraph(f"Review #{idx}", HEADING_STYLE))
+
+        # Create info table
+        data = [
+            ['Business Name:', review.get('business_name', 'N/A')],
+            ['Type:', review.get('business_type', 'N/A')],
+            ['Category:', review.get('category', 'N/A')],
+            ['Rating:', '★' * review.get('star_rating', 0)],
+            ['Language:', review.get('language', 'N/A')],
+            ['Use Case:', review.get('use_case', 'N/A')],
+            ['Date:', review.get('timestamp', 'N/A')],
+        ]
+
+        table = Table(data, colWidths=[1.5*inch, 4*inch])
+        table.setStyle(INFO_TABLE_STYLE)
+        elements.append(table)
+        elements.append(Spacer(1, 0.2*inch))
+
+        # Review text
+        elements.append(Paragraph("<b>Review:</b>", NORMAL_STYLE))
+        review_text = review.get('review', 'N/A')
+        elements.append(Paragraph(review_text, NORMAL_STYLE))
+
+        # Stats
+        char_count = review.get('char_count', 'N/A')
+        tokens = review.get('token_usage', {}).get('total_tokens', 'N/A')
+        elements.append(Spacer(1, 0.1*inch))
+        elements.append(Paragraph(f"<i>Characters: {char_count} | Tokens: {tokens}</i>", NORMAL_STYLE))
+
+        elements.append(Spacer(1, 0.4*inch))
+
+    # Build PDF
+    doc.build(elements)
+    EXPORT_RENDER_SECONDS.observe(time.perf_counter() - started, format='pdf')
+    return buffer.getvalue()
+
+
+def selection_key(review_ids):
+    """Cache key (and job id) for a set of selected review ids, independent of their order"""
+    return hashlib.sha256("\n".join(sorted(review_ids)).encode('utf-8')).hexdigest()[:32]
+
+
+def is_valid_key(key):
+    """True for keys produced by selection_key (guards the cache paths)"""
+    return re.fullmatch(r'[0-9a-f]{32}', key or '') is not None
+
+
+def pdf_path(key):
+    """Path of the cached PDF for a selection key"""
+    return os.path.join(PDF_CACHE_DIR, f"{key}.pdf")
+
+
+def _status_path(key):
+    return os.path.join(PDF_CACHE_DIR, f"{key}.json")
+
+
+def _write_atomic(path, data):
+    # Unique tmp name: threads of one worker may render the same key at once
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path) or '.', prefix=os.path.basename(path) + '.',
+                                     suffix='.tmp', delete=False) as f:
+        f.write(data)
+    os.replace(f.name, path)
+
+
+def _set_status(key, status, error=None):
+    payload = {'job_id': key, 'status': status, 'error': error}
+    _write_atomic(_status_path(key), json.dumps(payload).encode('utf-8'))
+
+
+def _prune_cache():
+    """Drop the oldest cached PDFs beyond PDF_CACHE_MAX_FILES"""
+    pdfs = [os.path.join(PDF_CACHE_DIR, name) for name in os.listdir(PDF_CACHE_DIR) if name.endswith('.pdf')]
+    if len(pdfs) <= PDF_CACHE_MAX_FILES:
+        return
+    pdfs.sort(key=os.path.getmtime)
+    for path in pdfs[:-PDF_CACHE_MAX_FILES]:
+        for stale in (path, path[:-len('.pdf')] + '.json'):
+            try:
+                os.remove(stale)
+            except FileNotFoundError:
+                pass
+
+
+def cached_pdf(key):
+    """Return the cached PDF path for a selection, or None"""
+    if not is_valid_key(key):
+        return None
+    path = pdf_path(key)
+    return path if os.path.exists(path) else None
+
+
+def export_pdf(key, reviews):
+    """Render reviews and store the PDF in the cache; returns its path"""
+    os.makedirs(PDF_CACHE_DIR, exist_ok=True)
+    _write_atomic(pdf_path(key), render_pdf(reviews))
+    _prune_cache()
+    return pdf_path(key)
+
+
+def _run_job(key, reviews):
+    try:
+        _set_status(key, 'running')
+        export_pdf(key, reviews)
+        _set_status(key, 'done')
+    except Exception as e:
+        _set_status(key, 'failed', str(e))
+
+
+def start_job(key, reviews):
+    """Queue a background export unless the same selection is cached or in progress"""
+    os.makedirs(PDF_CACHE_DIR, exist_ok=True)
+    status = job_status(key)
+    if status and status['status'] == 'done':
+        return status
+    if status and status['status'] in ('queued', 'running'):
+        if time.time() - os.path.getmtime(_status_path(key)) < PDF_JOB_TIMEOUT:
+            return status
+
+    _set_status(key, 'queued')
+    _executor.submit(_run_job, key, reviews)
+    return job_status(key)
+
+
+def job_status(key):
+    """Return {'job_id', 'status', 'error'} for a job, or None if unknown"""
+    if not is_valid_key(key):
+        return None
+    if cached_pdf(key):
+        return {'job_id': key, 'status': 'done', 'error': None}
+    try:
+        with open(_status_path(key), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
@@ -0,0 +1,216 @@
+"""
+Offline evaluation of the compact prompt mode against the full prompt.
+
+Builds both prompts from identical seeded inputs and reports per mode:
+prompt tokens, output length compliance and rule violations
+(exclamation marks, dashes, banned phrases, ...). Sarvam is never called
+unless --record is given; responses come from a recording or a stub.
+Stub responses do not depend on the prompt, so without --record/--replay
+only prompt tokens are reported.
+
+    python prompt_eval.py --cases 200                         # stub responder, prompt tokens only
+    python prompt_eval.py --record eval_recording.jsonl       # call Sarvam once, save responses
+    python prompt_eval.py --replay eval_recording.jsonl       # re-score saved responses
+"""
+import argparse
+import json
+import random
+import re
+import sys
+from collections import Counter
+
+from advanced_review_generator import (
+    API_ENDPOINT, API_KEY, ReviewGenerator, review_payload
+)
+from history_cache import get_history_cache
+from prompt_templates import LANGUAGES, USE_CASES, compile_prompt, format_avoid_openings
+from review_rules import find_violations
+
+MODES = ("full", "compact")
+
+# Rough BPE-like count: words and punctuation marks; good enough to compare modes
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_prompt_tokens(payload):
+    return sum(len(_TOKEN_RE.findall(message['content'])) for message in payload['messages'])
+
+
+def make_cases(count, seed):
+    """Seeded request specs with the random prompt parts fixed up front"""
+    rng = random.Random(seed)
+    generator = ReviewGenerator.__new__(ReviewGenerator)  # only the random pickers are used
+    cases = []
+    for i in range(count):
+        random.seed(seed + i)
+        min_chars, max_chars = generator.get_unique_length_range()
+        cases.append(dict(
+            case=i,
+            business_name=f"Business {i}",
+            business_type=rng.choice(["shop", "restaurant", "clinic", "coaching centre", "salon"]),
+            category=rng.choice(["Food & Beverage", "Healthcare", "Education", "Retail"]),
+            star_rating=rng.randint(1, 5),
+            language=rng.choice(LANGUAGES),
+            use_case=rng.choice(USE_CASES),
+            unique_structure=generator.get_unique_structure(),
+            min_chars=min_chars,
+            max_chars=max_chars,
+        ))
+    return cases
+
+
+def build_payload(case, mode, openings):
+    compact = mode == "compact"
+    prompt = compile_prompt(case['language'], case['use_case'], case['star_rating'], compact).render(
+        business_type=case['business_type'],
+        business_name=case['business_name'],
+        category=case['category'],
+        unique_structure=case['unique_structure'],
+        avoid_openings=format_avoid_openings(openings, compact),
+        min_chars=case['min_chars'],
+        max_chars=case['max_chars'],
+    )
+    # Same body generate_review() sends, one completion per case
+    return review_payload(prompt, compact, case['max_chars'], case['language'])
+
+
+class StubResponder:
+    """Replays stored review texts (business name swapped in) instead of calling Sarvam
+
+    The sample depends only on the case, so every mode gets the same response.
+    """
+
+    def __init__(self, seed):
+        history = get_history_cache().all()
+        self.samples = [r for r in history if r.get('review') and r.get('business_name')]
+        self.seed = seed
+
+    def respond(self, case, mode, payload):
+        if not self.samples:
+            return f"{case['business_name']} was good. The staff helped me quickly.", None
+        sample = random.Random(self.seed + case['case']).choice(self.samples)
+        return sample['review'].replace(sample['business_name'], case['business_name']), None
+
+
+class RecordedResponder:
+    """Serves responses saved by --record, keyed by (case, mode)"""
+
+    def __init__(self, path):
+        self.responses = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.responses[(entry['case'], entry['mode'])] = (entry['text'], entry.get('prompt_tokens'))
+
+    def respond(self, case, mode, payload):
+        return self.responses.get((case['case'], mode), ("", None))
+
+
+class RecordingResponder:
+    """Calls Sarvam for real and appends every response to a JSONL recording"""
+
+    def __init__(self, path):
+        if not API_KEY:
+            raise SystemExit("❌ SARVAM_API_KEY is required for --record")
+        from sarvam_client import post_chat_completion
+        self.post = post_chat_completion
+        self.file = open(path, 'w', encoding='utf-8')
+
+    def respond(self, case, mode, payload):
+        response = self.post(API_ENDPOINT, API_KEY, payload)
+        if response.status_code != 200:
+            text, prompt_tokens = "", None
+        else:
+            result = response.json()
+            text = result['choices'][0]['message']['content']
+            prompt_tokens = (result.get('usage') or {}).get('prompt_tokens')
+        self.file.write(json.dumps({'case': case['case'], 'mode': mode, 'text': text,
+                                    'prompt_tokens': prompt_tokens}, ensure_ascii=False) + "\n")
+        self.file.flush()
+        return text, prompt_tokens
+
+
+def evaluate(cases, responder, openings):
+    report = {}
+    for mode in MODES:
+        prompt_tokens, measured, compliant, violations = 0, 0, 0, Counter()
+        for case in cases:
+            payload = build_payload(case, mode, openings)
+            text, api_prompt_tokens = responder.respond(case, mode, payload)
+            if api_prompt_tokens:
+                prompt_tokens += api_prompt_tokens
+                measured += 1
+            else:
+                prompt_tokens += estimate_prompt_tokens(payload)
+            text = ReviewGenerator.clean_review_text(text, case['min_chars'], case['max_chars'])
+            found = find_violations(text, case['business_name'], case['min_chars'], case['max_chars'])
+            if not {'too_short', 'too_long'} & set(found):
+                compliant += 1
+            violations.update(found)
+        report[mode] = {
+            'avg_prompt_tokens': prompt_tokens / len(cases),
+            'prompt_tokens_measured': measured,
+            'length_compliance': compliant / len(cases),
+            'violations': dict(violations),
+        }
+    return report
+
+
+def print_report(report, cases, quality=True):
+    print("=" * 70)
+    print("            PROMPT MODE EVALUATION")
+    print("=" * 70)
+    print(f"  • Cases: {cases}")
+    for mode in MODES:
+        stats = report[mode]
+        print(f"\n📊 {mode.upper()}:")
+        print(f"  • Avg prompt tokens:  {stats['avg_prompt_tokens']:.1f}"
+              f" ({stats['prompt_tokens_measured']} measured by API)")
+        if not quality:
+            continue
+        print(f"  • Length compliance:  {stats['length_compliance'] * 100:.1f}%")
+        for rule, count in sorted(stats['violations'].items()):
+            print(f"  • {rule}: {count}")
+    if not quality:
+        print("\nℹ️ Stub responses ignore the prompt; use --record or --replay to compare output quality")
+    full, compact = report['full']['avg_prompt_tokens'], report['compact']['avg_prompt_tokens']
+    print(f"\n✅ Compact saves {(1 - compact / full) * 100:.1f}% prompt tokens per review")
+    print("=" * 70)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare full vs compact prompts offline")
+    parser.add_argument("--cases", type=int, default=100, help="request specs to evaluate")
+    parser.add_argument("--seed", type=int, default=42)
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--replay", metavar="JSONL", help="score responses saved by --record")
+    group.add_argument("--record", metavar="JSONL", help="call Sarvam and save responses")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    cases = make_cases(args.cases, args.seed)
+    # Same "recent openings" block for both modes so only the instructions differ
+    openings = [r['review'][:30] for r in get_history_cache().recent(5) if r.get('review')]
+
+    if args.record:
+        responder = RecordingResponder(args.record)
+    elif args.replay:
+        responder = RecordedResponder(args.replay)
+    else:
+        responder = StubResponder(args.seed)
+
+    report = evaluate(cases, responder, openings)
+    quality = bool(args.record or args.replay)
+    if not quality:
+        for stats in report.values():
+            del stats['length_compliance'], stats['violations']
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print_report(report, len(cases), quality)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+import functools
+import os
+import threading
+from collections import deque
+from history_cache import get_history_cache
+from review_rules import BANNED_PHRASES, FANCY_WORDS
+
+# Prompt text split at import time into static segments per
+# (language, use_case, star_rating); only business fields, structure,
+# length range and openings to avoid are spliced in per request.
+
+SENTIMENTS = {
+    1: "Soft tone, gentle issues, polite feedback about problems. Disappointed but respectful.",
+    2: "Mostly positive with mild suggestions. Some concerns but hopeful tone.",
+    3: "Balanced and fair. Mix of pros and cons. Neutral perspective.",
+    4: "Positive with a small suggestion for improvement. Satisfied overall.",
+    5: "Warm, detailed, fully satisfied. Enthusiastic about the experience."
+}
+
+ENGLISH_INSTRUCTION = """Write the entire review in English only.
+VOCABULARY RULES:
+- Use SIMPLE, EVERYDAY words that anyone can understand
+- Avoid complex or fancy words like: "exceptional", "meticulous", "remarkable", "professionalism", "precision"
+- Use easy words like: good, great, nice, happy, helpful, friendly, clean, quick, easy, caring
+- Write like a normal person talks, not like a professional writer
+- Keep sentences short and simple
+Example good words: loved, enjoyed, felt comfortable, took care, listened well, explained clearly"""
+
+GUJARATI_INSTRUCTION = """Write Gujarati using English letters only (Romanized Gujarati).
+GUJARATI GRAMMAR RULES - VERY IMPORTANT:
+- Use correct Gujarati sentence structure: Subject + Object + Verb
+- Correct verb conjugations: 
+  * "hato" (was - masculine), "hati" (was - feminine)
+  * "chu" (am/is), "chhe" (is/are)
+  * "karyu" (did), "kari" (did - feminine)
+  * "rahyo" (stayed - masculine), "rahi" (stayed - feminine)
+- Proper postpositions: "ma" (in), "thi" (from), "ne" (and/to)
+- Natural word order, not English translation
+- Use proper Gujarati expressions and idioms
+- Agreement between gender, number, and verb forms
+Example: "Mare aa jagya-e jaavu bahuj saras rahyu" (My visit to this place was very good)"""
+
+HINDI_INSTRUCTION = """Write Hindi using English letters only (Romanized Hindi).
+HINDI GRAMMAR RULES:
+- Correct verb conjugations with proper gender agreement
+- Use "ne" for past tense subjects correctly
+- Proper sentence structure
+- Natural Hindi expressions
+Example: "Mujhe yahan jane mein bahut achha laga" (I felt very good going here)"""
+
+PROMPT_TEMPLATE = """Generate a realistic {use_case} for a {business_type} called "{business_name}" in the {category} category.
+
+STAR RATING: {star_rating}/5
+SENTIMENT: {sentiment}
+
+UNIQUENESS REQUIREMENTS:
+- STRUCTURE PATTERN: {unique_structure}
+- This review MUST be completely different from previous reviews
+{avoid_openings}
+- Create a FRESH opening sentence (not used before)
+- Use different vocabulary and phrasing
+- Vary the story and details mentioned
+
+STRICT WRITING RULES:
+- Length: Between {min_chars} and {max_chars} characters
+- Tone: Natural and conversational (like talking to a friend)
+- First sentence must be unique (avoid repetitive openings)
+- No repetition of ideas
+- Mention business name "{business_name}" naturally in the review
+- Include one emotional detail or personal experience
+- Do NOT mention the star rating in the review text
+- Do NOT use these overused phrases:
+  * "Highly recommend"
+  * "I felt safe"
+  * "Amazing experience"
+  * "Best place ever"
+  * "Exceeded expectations"
+  * "Exceeded all my expectations"
+  * "Cannot recommend enough"
+- AVOID fancy/complex words like: exceptional, remarkable, meticulous, professionalism, precision, genuinely, truly, outstanding
+- No exclamation marks
+- No dashes (—) in the text
+- No em dashes or en dashes
+- Use simple periods and commas only for punctuation
+- Write like a real person sharing their experience
+- Vary sentence structure and length
+
+LANGUAGE: {language_instruction}
+
+IMPORTANT:
+- Return ONLY the review text
+- No quotes, no markdown, no formatting
+- No template-like structure
+- Make it sound authentic and unique
+
+Generate the review now:"""
+
+SYSTEM_MESSAGE = "You are an expert at writing authentic, varied, and realistic business reviews. Never repeat patterns or use template language. Each review must be completely unique. Keep reviews concise and within the specified character limit."
+
+# "compact" sends a condensed but equivalent instruction set (far fewer prompt tokens)
+PROMPT_MODE = os.getenv("PROMPT_MODE", "full")
+
+COMPACT_SYSTEM_MESSAGE = "You write short, natural, unique business reviews within the given length."
+
+COMPACT_ENGLISH_INSTRUCTION = "English only. Short simple sentences, everyday words (good, nice, helpful, friendly, clean, quick, caring)."
+
+COMPACT_GUJARATI_INSTRUCTION = "Romanized Gujarati (English letters). Natural Subject+Object+Verb order, correct gender/number agreement (hato/hati, rahyo/rahi, chhe), postpositions ma/thi/ne."
+
+COMPACT_HINDI_INSTRUCTION = "Romanized Hindi (English letters). Natural word order, correct gender agreement, 'ne' for past tense subjects."
+
+COMPACT_PROMPT_TEMPLATE = (
+    'Write a {use_case} for {business_type} "{business_name}" ({category}). '
+    "{star_rating}/5 stars, tone: {sentiment}\n"
+    "Structure: {unique_structure}\n"
+    "Length: {min_chars}-{max_chars} characters.\n"
+    'Rules: mention "{business_name}" naturally; one personal or emotional detail; '
+    "fresh opening, new wording, no repeated ideas; do not mention the rating; "
+    "simple words; only periods and commas (no ! and no dashes of any kind); no quotes or markdown.\n"
+    "Never use: " + ", ".join(phrase.lower() for phrase in BANNED_PHRASES) + ", "
+    + ", ".join(FANCY_WORDS) + ".\n"
+    "{avoid_openings}"
+    "Language: {language_instruction}\n"
+    "Return only the review text."
+)
+
+# Values filled in per request
+DYNAMIC_FIELDS = ('business_type', 'business_name', 'category', 'unique_structure',
+                  'avoid_openings', 'min_chars', 'max_chars')
+
+# Combinations offered by the web form and CLI, compiled at import
+LANGUAGES = ("English", "Gujarati Romanized", "Hindi Romanized")
+USE_CASES = ("Customer review", "Student feedback", "Patient experience")
+
+# Openings of this many recent reviews are listed as "don't start like"
+RECENT_OPENINGS = 5
+OPENING_CHARS = 30
+
+
+def language_instruction(language, compact=False):
+    """Language-specific writing rules"""
+    language = language.lower()
+    if language == "english":
+        return COMPACT_ENGLISH_INSTRUCTION if compact else ENGLISH_INSTRUCTION
+    if language in ["gujarati", "gujarati romanized"]:
+        return COMPACT_GUJARATI_INSTRUCTION if compact else GUJARATI_INSTRUCTION
+    if language in ["hindi", "hindi romanized"]:
+        return COMPACT_HINDI_INSTRUCTION if compact else HINDI_INSTRUCTION
+    return ""
+
+
+def system_message(compact=False):
+    """System message matching the prompt mode"""
+    return COMPACT_SYSTEM_MESSAGE if compact else SYSTEM_MESSAGE
+
+
+class CompiledPrompt:
+    """Static prompt segments with the names of the fields that go between them"""
+
+    def __init__(self, literals, fields):
+        self.literals = literals
+        self.fields = fields
+
+    def render(self, **values):
+        pieces = [self.literals[0]]
+        for field, literal in zip(self.fields, self.literals[1:]):
+            pieces.append(str(values[field]))
+            pieces.append(literal)
+        return "".join(pieces)
+
+
+@functools.lru_cache(maxsize=512)
+def compile_prompt(language, use_case, star_rating, compact=False):
+    """Render everything static for one combination, split around the dynamic fields"""
+    markers = {field: f"\x00{field}\x00" for field in DYNAMIC_FIELDS}
+    template = COMPACT_PROMPT_TEMPLATE if compact else PROMPT_TEMPLATE
+    text = template.format(
+        use_case=use_case.lower(),
+        star_rating=star_rating,
+        sentiment=SENTIMENTS.get(star_rating, SENTIMENTS[3]),
+        language_instruction=language_instruction(language, compact),
+        **markers
+    )
+    parts = text.split("\x00")
+    return CompiledPrompt(parts[0::2], parts[1::2])
+
+
+# Warm the cache for every combination the UI can send
+for _language in LANGUAGES:
+    for _use_case in USE_CASES:
+        for _star_rating in range(1, 6):
+            compile_prompt(_language, _use_case, _star_rating)
+            compile_prompt(_language, _use_case, _star_rating, True)
+
+
+def format_avoid_openings(openings, compact=False):
+    """The avoid_openings prompt field for a list of openings"""
+    if compact:
+        if not openings:
+            return ""
+        return "Don't start like: " + " | ".join(f"'{opening}...'" for opening in openings) + "\n"
+    return "\n".join([f"  * Don't start like: '{opening}...'" for opening in openings])
+
+
+class RecentOpenings:
+    """Ring buffer of the latest review openings, fed by HistoryCache"""
+
+    def __init__(self, history, size=RECENT_OPENINGS):
+        self.history = history
+        self.openings = deque(maxlen=size)
+        history.subscribe(self)
+
+    def clear(self):
+        self.openings.clear()
+
+    def add(self, seq, review):
+        text = review.get('review', '')
+        if text:
+            self.openings.append(text[:OPENING_CHARS])
+
+    def avoid_lines(self, compact=False):
+        """Prompt lines asking the model not to reuse recent openings"""
+        # Pull in reviews other workers saved since we last looked (a cheap os.stat when none)
+        self.history.refresh()
+        return format_avoid_openings(list(self.openings), compact)
+
+
+_openings = {}
+_openings_lock = threading.Lock()
+
+
+def get_recent_openings(history=None):
+    """Return the process-wide openings ring buffer for a history cache"""
+    history = history or get_history_cache()
+    with _openings_lock:
+        openings = _openings.get(id(history))
+        if openings is None:
+            openings = RecentOpenings(history)
+            _openings[id(history)] = openings
+        return openings
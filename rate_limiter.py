@@ -0,0 +1,205 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from file_lock import file_lock
+
+# Client-side Sarvam AI budget, shared by every thread and gunicorn worker.
+# 0 disables a bucket.
+SARVAM_REQUESTS_PER_SECOND = float(os.getenv("SARVAM_REQUESTS_PER_SECOND", "5"))
+SARVAM_TOKENS_PER_MINUTE = float(os.getenv("SARVAM_TOKENS_PER_MINUTE", "60000"))
+
+# Longest a caller queues for budget before giving up
+SARVAM_RATE_MAX_WAIT = float(os.getenv("SARVAM_RATE_MAX_WAIT", "30"))
+
+RATE_STATE_FILE = os.getenv("SARVAM_RATE_STATE_FILE", "sarvam_rate_limit.json")
+
+
+class RateLimitExceeded(Exception):
+    """Raised when budget did not free up within SARVAM_RATE_MAX_WAIT"""
+
+
+def estimate_tokens(payload):
+    """Rough upper bound on tokens a chat-completions payload will use"""
+    prompt_chars = sum(len(message.get('content', '')) for message in payload.get('messages', []))
+    return prompt_chars // 4 + payload.get('max_tokens', 0) * payload.get('n', 1)
+
+
+def _pid_alive(pid):
+    if os.name == 'nt':
+        # os.kill(pid, 0) would send CTRL_C_EVENT on Windows
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class RateLimiter:
+    """Two token buckets (requests/sec, tokens/min) kept in a small locked state file"""
+
+    def __init__(self, state_file=RATE_STATE_FILE, requests_per_second=SARVAM_REQUESTS_PER_SECOND,
+                 tokens_per_minute=SARVAM_TOKENS_PER_MINUTE, max_wait=SARVAM_RATE_MAX_WAIT):
+        self.state_file = state_file
+        self.lock_path = state_file + ".lock"
+        self.requests_per_second = requests_per_second
+        self.tokens_per_minute = tokens_per_minute
+        self.max_wait = max_wait
+        # Serializes this process's threads before they contend for the file lock
+        self.local_lock = threading.Lock()
+
+    def _load(self, now):
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            state = {}
+        state.setdefault('requests', self.requests_per_second)
+        state.setdefault('tokens', self.tokens_per_minute)
+        state.setdefault('updated', now)
+        state.setdefault('waiting', {})
+
+        # Refill both buckets for the time elapsed since the last update
+        elapsed = max(0.0, now - state['updated'])
+        state['requests'] = min(self.requests_per_second, state['requests'] + elapsed * self.requests_per_second)
+        state['tokens'] = min(self.tokens_per_minute, state['tokens'] + elapsed * self.tokens_per_minute / 60)
+        state['updated'] = now
+        return state
+
+    def _save(self, state):
+        tmp_path = f"{self.state_file}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_file)
+
+    def _update(self, change):
+        """Run change(state) under the cross-process lock and persist the result"""
+        with self.local_lock, file_lock(self.lock_path):
+            state = self._load(time.time())
+            result = change(state)
+            self._save(state)
+            return result
+
+    def _adjust_waiting(self, state, delta):
+        pid = str(os.getpid())
+        count = state['waiting'].get(pid, 0) + delta
+        if count > 0:
+            state['waiting'][pid] = count
+        else:
+            state['waiting'].pop(pid, None)
+
+    def _try_take(self, state, tokens):
+        """Take one request and `tokens` tokens if available; else return the seconds to wait"""
+        need_requests = 1 - state['requests'] if self.requests_per_second else 0
+        need_tokens = tokens - state['tokens'] if self.tokens_per_minute else 0
+        if need_requests <= 0 and need_tokens <= 0:
+            if self.requests_per_second:
+                state['requests'] -= 1
+            if self.tokens_per_minute:
+                state['tokens'] -= tokens
+            self._adjust_waiting(state, -1)
+            return 0.0
+        # Seconds until both deficits are refilled
+        wait = 0.0
+        if need_requests > 0:
+            wait = max(wait, need_requests / self.requests_per_second)
+        if need_tokens > 0:
+            wait = max(wait, need_tokens * 60 / self.tokens_per_minute)
+        return wait
+
+    def _next_wait(self, tokens, deadline):
+        """One attempt to take budget: 0.0 when taken, else how long to sleep"""
+        wait = self._update(lambda state: self._try_take(state, tokens))
+        if wait and time.time() + wait > deadline:
+            raise RateLimitExceeded(
+                f"Sarvam AI rate limit budget not available within {self.max_wait:.0f} seconds"
+            )
+        return min(wait, 1.0)
+
+    def acquire(self, tokens):
+        """Block until one request and `tokens` tokens of budget are available"""
+        if not self.requests_per_second and not self.tokens_per_minute:
+            return
+
+        # A single call larger than the whole bucket may go once the bucket is full
+        tokens = min(tokens, self.tokens_per_minute) if self.tokens_per_minute else 0
+        deadline = time.time() + self.max_wait
+
+        self._update(lambda state: self._adjust_waiting(state, 1))
+        try:
+            while True:
+                wait = self._next_wait(tokens, deadline)
+                if wait == 0.0:
+                    return
+                time.sleep(wait)
+        except BaseException:
+            self._update(lambda state: self._adjust_waiting(state, -1))
+            raise
+
+    async def acquire_async(self, tokens):
+        """acquire() for asyncio callers: the locked state file is read and written
+        in a worker thread and waits are asyncio sleeps, so the event loop never blocks
+        """
+        if not self.requests_per_second and not self.tokens_per_minute:
+            return
+
+        tokens = min(tokens, self.tokens_per_minute) if self.tokens_per_minute else 0
+        deadline = time.time() + self.max_wait
+
+        await asyncio.to_thread(self._update, lambda state: self._adjust_waiting(state, 1))
+        try:
+            while True:
+                wait = await asyncio.to_thread(self._next_wait, tokens, deadline)
+                if wait == 0.0:
+                    return
+                await asyncio.sleep(wait)
+        except BaseException:
+            await asyncio.to_thread(self._update, lambda state: self._adjust_waiting(state, -1))
+            raise
+
+    async def reconcile_async(self, estimated_tokens, usage):
+        """reconcile() run off the event loop"""
+        await asyncio.to_thread(self.reconcile, estimated_tokens, usage)
+
+    def reconcile(self, estimated_tokens, usage):
+        """Correct the token bucket with the real usage the API reported"""
+        if not self.tokens_per_minute or not usage:
+            return
+        actual = usage.get('total_tokens')
+        if actual is None:
+            return
+        estimated = min(estimated_tokens, self.tokens_per_minute)
+
+        def correct(state):
+            state['tokens'] = min(self.tokens_per_minute, state['tokens'] + estimated - actual)
+        self._update(correct)
+
+    def status(self):
+        """Current budget and queue depth across all workers"""
+        def read(state):
+            state['waiting'] = {pid: count for pid, count in state['waiting'].items() if _pid_alive(int(pid))}
+            return {
+                'requests_per_second': self.requests_per_second,
+                'tokens_per_minute': self.tokens_per_minute,
+                'available_requests': round(state['requests'], 2),
+                'available_tokens': int(state['tokens']),
+                'queue_depth': sum(state['waiting'].values())
+            }
+        return self._update(read)
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """Return the process-wide rate limiter"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
@@ -0,0 +1,113 @@
+from bisect import bisect_left, bisect_right
+
+# Review fields that can be filtered on through an exact-match index
+FILTER_FIELDS = ('business_name', 'star_rating', 'language', 'use_case', 'method')
+
+
+def review_id(seq, review):
+    """Stable id of a review; reviews saved before ids existed use their store position"""
+    return review.get('id') or str(seq)
+
+
+def normalize(value):
+    """Normalize a field value for case-insensitive exact matching"""
+    return str(value).strip().lower()
+
+
+class ReviewIndex:
+    """Posting lists per filter field plus a timestamp column, fed by HistoryCache
+
+    Sequence numbers are positions in the append-only store, so every posting
+    list is already sorted and newest-first paging is a reverse walk.
+    """
+
+    def __init__(self, history):
+        self.history = history
+        self.clear()
+        history.subscribe(self)
+
+    def clear(self):
+        self.by_id = {}
+        self.postings = {field: {} for field in FILTER_FIELDS}
+        self.timestamps = []
+        self.timestamps_sorted = True
+
+    def add(self, seq, review):
+        self.by_id[review_id(seq, review)] = seq
+        for field in FILTER_FIELDS:
+            value = review.get(field)
+            if value is not None:
+                self.postings[field].setdefault(normalize(value), []).append(seq)
+
+        timestamp = review.get('timestamp', '')
+        if self.timestamps and timestamp < self.timestamps[-1]:
+            self.timestamps_sorted = False
+        self.timestamps.append(timestamp)
+
+    def get_by_id(self, rid):
+        """Return the review with this id, or None"""
+        seq = self.by_id.get(rid)
+        return None if seq is None else self.history.get(seq)
+
+    def _timestamp_bounds(self, since, until):
+        """Translate a timestamp range into a [lo, hi) range of sequence numbers"""
+        lo, hi = 0, len(self.timestamps)
+        if self.timestamps_sorted:
+            if since:
+                lo = bisect_left(self.timestamps, since)
+            if until:
+                # Prefix match so "2025-12-09" includes the whole day
+                hi = bisect_right(self.timestamps, until + "\uffff")
+        return lo, hi
+
+    def query(self, filters=None, before=None, after=None, limit=50, since=None, until=None):
+        """Return up to `limit` (seq, review) pairs matching filters, newest first
+
+        `before` is the cursor for older pages: only reviews with a smaller seq
+        are returned. `after` pages the other way: the `limit` matches closest
+        above that seq, still returned newest first.
+        """
+        self.history.refresh()
+        filters = {field: normalize(value) for field, value in (filters or {}).items()}
+
+        with self.history.lock:
+            reviews = self.history.reviews
+            lo, hi = self._timestamp_bounds(since, until)
+            if before is not None:
+                hi = min(hi, before)
+            if after is not None:
+                lo = max(lo, after + 1)
+
+            # Drive the walk from the shortest posting list, check the rest per record
+            driver = range(len(reviews))
+            for field, value in filters.items():
+                postings = self.postings[field].get(value)
+                if postings is None:
+                    return []
+                if len(postings) < len(driver):
+                    driver = postings
+
+            first, last = bisect_left(driver, lo), bisect_left(driver, hi)
+            if after is not None:
+                positions = range(first, last)
+            else:
+                positions = range(last - 1, first - 1, -1)
+            candidates = (driver[i] for i in positions)
+
+            results = []
+            for seq in candidates:
+                review = reviews[seq]
+                if any(normalize(review.get(field, '')) != value for field, value in filters.items()):
+                    continue
+                timestamp = review.get('timestamp', '')
+                if since and timestamp < since:
+                    continue
+                if until and timestamp[:len(until)] > until:
+                    continue
+                results.append((seq, review))
+                if len(results) >= limit:
+                    break
+
+            if after is not None:
+                results.reverse()
+            return results
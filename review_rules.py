@@ -0,0 +1,109 @@
+import re
+
+# Hard writing rules stated in the review prompt (prompt_templates.py)
+
+BANNED_PHRASES = (
+    "Highly recommend",
+    "I felt safe",
+    "Amazing experience",
+    "Best place ever",
+    "Exceeded expectations",
+    "Exceeded all my expectations",
+    "Cannot recommend enough",
+)
+
+FANCY_WORDS = (
+    "exceptional", "remarkable", "meticulous", "professionalism",
+    "precision", "genuinely", "truly", "outstanding",
+)
+
+# Plain replacements for the fancy words, used by repair_review()
+SIMPLE_WORDS = {
+    "exceptional": "very good",
+    "remarkable": "great",
+    "meticulous": "careful",
+    "professionalism": "good work",
+    "precision": "care",
+    "genuinely": "really",
+    "truly": "really",
+    "outstanding": "very good",
+}
+
+# Hyphen-minus between spaces, em dash, en dash and other dash punctuation
+DASH_PATTERN = r"\s-\s|[\u2010-\u2015\u2212]|--"
+DASH_RE = re.compile(DASH_PATTERN)
+
+# Every text rule in one alternation, so a single scan finds all of them.
+# Matched against the lowercased text (faster than re.IGNORECASE).
+RULES_RE = re.compile(
+    r"(?P<exclamation>!)"
+    rf"|(?P<dash>{DASH_PATTERN})"
+    r"|(?P<banned_phrase>" + "|".join(re.escape(phrase.lower()) for phrase in BANNED_PHRASES) + ")"
+    r"|(?P<fancy_word>\b(?:" + "|".join(FANCY_WORDS) + r")\b)"
+)
+
+# Violations repair_review() can fix without another API call (too_long is fixed by trimming)
+FIXABLE = frozenset(('exclamation', 'dash', 'fancy_word', 'too_long'))
+
+_WORD_HYPHEN_RE = re.compile(r"(?<=\w)[\u2010\u2011](?=\w)")
+_SPACED_DASH_RE = re.compile(r"\s*(?:\s-\s|--|[\u2012-\u2015\u2212])\s*")
+_EXCLAMATION_RE = re.compile(r"!+")
+_FANCY_RE = re.compile(r"\b(?:" + "|".join(FANCY_WORDS) + r")\b", re.IGNORECASE)
+_DOUBLE_PUNCT_RE = re.compile(r"([.,])\s*[.,]+")
+
+
+def find_violations(text, business_name=None, min_chars=None, max_chars=None):
+    """Return the names of the prompt rules a review breaks (one regex pass)"""
+    violations = []
+
+    if min_chars is not None and len(text) < min_chars:
+        violations.append('too_short')
+    if max_chars is not None and len(text) > max_chars:
+        violations.append('too_long')
+
+    lowered = text.lower()
+    found = {match.lastgroup for match in RULES_RE.finditer(lowered)}
+    for rule in ('exclamation', 'dash', 'banned_phrase', 'fancy_word'):
+        if rule in found:
+            violations.append(rule)
+
+    if business_name and business_name.lower() not in lowered:
+        violations.append('missing_business_name')
+
+    return violations
+
+
+def _simple_word(match):
+    word = match.group(0)
+    replacement = SIMPLE_WORDS[word.lower()]
+    return replacement[0].upper() + replacement[1:] if word[0].isupper() else replacement
+
+
+def repair_review(text):
+    """Deterministically fix punctuation, dash and word-choice violations
+
+    Returns (text, repaired rule names). Banned phrases, a missing business
+    name and length problems are left for the caller.
+    """
+    repaired = []
+
+    if '!' in text:
+        text = _EXCLAMATION_RE.sub('.', text)
+        repaired.append('exclamation')
+
+    if DASH_RE.search(text):
+        # Hyphen characters inside a word become a plain hyphen, dashes between clauses a comma
+        text = _WORD_HYPHEN_RE.sub('-', text)
+        text = _SPACED_DASH_RE.sub(', ', text)
+        repaired.append('dash')
+
+    if _FANCY_RE.search(text):
+        text = _FANCY_RE.sub(_simple_word, text)
+        repaired.append('fancy_word')
+
+    if repaired:
+        text = _DOUBLE_PUNCT_RE.sub(r'\1', text)
+        text = re.sub(r"\s+([.,])", r"\1", text)
+        text = re.sub(r"\s{2,}", " ", text).strip(" ,")
+
+    return text, repaired
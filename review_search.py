@@ -0,0 +1,246 @@
+import heapq
+import math
+from functools import lru_cache
+from itertools import islice
+import os
+import re
+from array import array
+from bisect import bisect_left
+
+# Matches scored per query: only the newest this many are ranked, and results
+# report truncated=True when older reviews were not scanned
+SEARCH_MAX_CANDIDATES = int(os.getenv("SEARCH_MAX_CANDIDATES", "2000"))
+
+# While the index is still being built after start, only this many newest reviews are searched
+SEARCH_SCAN_RECENT = int(os.getenv("SEARCH_SCAN_RECENT", "5000"))
+
+# Review fields that are searched; business fields count twice when ranking
+TEXT_FIELDS = ('review',)
+BUSINESS_FIELDS = ('business_name', 'business_type', 'category')
+
+TOKEN_RE = re.compile(r"\w+")
+REPEATED_RE = re.compile(r"(.)\1+")
+ASPIRATED_RE = re.compile(r"(?<=[bcdgjkpt])h")
+
+# Common English words kept as written: folding would merge them with other
+# words ("thanks" -> "tanks", "with" -> "wit", "good" -> "god")
+ENGLISH_WORDS = frozenset("""
+    the this that these those there their they them then than thank thanks thankful
+    three third thirty through throughout though thought think thing things thin thick
+    with without within both other others another either whether together rather
+    further nothing something anything everything month months health healthy north
+    south teeth truth bath path worth smooth therapy theatre theater method mother
+    father brother weather clothes cloth
+    check checked checkup chair chairs child children change changed charge charges
+    charged cheap chat chicken choice choose chose each much such which teach teacher
+    teachers teaching coach coaching lunch touch reach watch school chemist chef
+    kitchen cheese chocolate machine research rich
+    phone photo photos pharmacy physical physics physiotherapy
+    right night light bright eight high highly enough tough laugh daughter caught
+    bought brought taught straight weight might sight tonight
+    good food too see seen all will well feel feels free staff need needed book booked
+    room rooms look looked soon keep class classes really happy coffee little pretty
+    better still small full call called off offer offered fee fees week door floor cool
+    pool cook cooked sweet street appointment attention different difficult effort
+    excellent professional process access success address less bill skill skills
+    dinner butter matter summer
+""".split())
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+
+@lru_cache(maxsize=200000)
+def fold(token):
+    """
+    Spelling-insensitive form of a token. Romanized Hindi/Gujarati has no fixed
+    spelling ("accha", "achha", "achhaa"), so repeated letters are collapsed and
+    the "h" of aspirated consonants is dropped. Common English words are left as
+    they are; rarer ones go through the same fold.
+    """
+    if token in ENGLISH_WORDS:
+        return token
+    token = REPEATED_RE.sub(r"\1", token)
+    return ASPIRATED_RE.sub("", token)
+
+
+def tokenize(text):
+    """Folded search terms of a text; single characters are skipped"""
+    return [fold(token) for token in TOKEN_RE.findall(str(text).lower()) if len(token) > 1]
+
+
+def review_counts(review):
+    """Term -> weighted frequency of one review; business fields count twice"""
+    counts = {}
+    for field in TEXT_FIELDS:
+        for term in tokenize(review.get(field) or ''):
+            counts[term] = counts.get(term, 0) + 1
+    for field in BUSINESS_FIELDS:
+        for term in tokenize(review.get(field) or ''):
+            counts[term] = counts.get(term, 0) + 2
+    return counts
+
+
+def idf(total, document_frequency):
+    return math.log(1 + (total - document_frequency + 0.5) / (document_frequency + 0.5))
+
+
+def bm25(idfs, tfs, length, average_length):
+    norm = K1 * (1 - B + B * length / average_length)
+    return sum(weight * tf * (K1 + 1) / (tf + norm) for weight, tf in zip(idfs, tfs))
+
+
+def index_review(postings, lengths, review):
+    """Append one review to posting lists and per-review lengths; returns its length
+
+    Reviews must arrive in store order, so lengths is indexed by seq and every
+    posting list stays sorted.
+    """
+    counts = review_counts(review)
+    seq = len(lengths)
+    length = sum(counts.values())
+    lengths.append(length)
+
+    for term, count in counts.items():
+        entry = postings.get(term)
+        if entry is None:
+            entry = postings[term] = (array('I'), array('B'))
+        entry[0].append(seq)
+        entry[1].append(min(count, 255))
+    return length
+
+
+class SearchIndex:
+    """Inverted index over review text and business fields, fed by HistoryCache
+
+    Each term maps to parallel arrays of store sequence numbers and term
+    frequencies. Reviews arrive in store order, so every posting list stays
+    sorted and a new review is a few appends. The history is indexed in the
+    background so a worker boots without waiting for it; until then searches
+    scan the newest SEARCH_SCAN_RECENT reviews.
+    """
+
+    def __init__(self, history):
+        self.history = history
+        self.clear()
+        self.ready = history.subscribe(self, background=True)
+
+    def clear(self):
+        self.postings = {}            # term -> (array of seq, array of term frequency)
+        self.lengths = array('I')     # terms per review, by seq
+        self.total_length = 0
+
+    def add(self, seq, review):
+        self.total_length += index_review(self.postings, self.lengths, review)
+
+    def rebuild(self):
+        """Re-index every review from the store, e.g. after changing the tokenizer
+
+        The new index is built from a snapshot without holding the history lock,
+        so saves and searches carry on; it is swapped in under the lock after
+        indexing whatever was appended in the meantime.
+        """
+        if not self.ready.is_set():
+            return  # the initial build is still running with the current tokenizer
+        with self.history.lock:
+            self.history.refresh()
+            reviews = self.history.reviews
+            count = len(reviews)
+
+        postings, lengths, total_length = {}, array('I'), 0
+        for review in islice(reviews, count):
+            total_length += index_review(postings, lengths, review)
+
+        with self.history.lock:
+            self.history.refresh()
+            if self.history.reviews is not reviews:
+                # The store was replaced meanwhile and the live index re-fed from scratch
+                return
+            for review in islice(reviews, count, None):
+                total_length += index_review(postings, lengths, review)
+            self.postings, self.lengths, self.total_length = postings, lengths, total_length
+
+    def search(self, query, limit=20):
+        """Return (results, truncated): up to `limit` (seq, review, score) matching every
+        query term, best first
+
+        Candidates come from the rarest term; each is looked up in the other
+        posting lists by bisection, newest first, so common words never force
+        a walk over the whole index. Only the newest SEARCH_MAX_CANDIDATES
+        matches are ranked; truncated is True when older reviews were not scanned.
+        """
+        self.history.refresh()
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return [], False
+        if not self.ready.is_set():
+            return self._scan_recent(terms, limit)
+
+        with self.history.lock:
+            postings = []
+            for term in terms:
+                entry = self.postings.get(term)
+                if entry is None:
+                    return [], False
+                postings.append(entry)
+            postings.sort(key=lambda entry: len(entry[0]))
+
+            reviews = self.history.reviews
+            total = len(self.lengths)
+            average_length = self.total_length / total if total else 1
+            idfs = [idf(total, len(seqs)) for seqs, _ in postings]
+
+            scored = []
+            truncated = False
+            driver_seqs, driver_tfs = postings[0]
+            others = postings[1:]
+            # Walking newest first, each list only needs searching below the last hit
+            bounds = [len(seqs) for seqs, _ in others]
+            for position in range(len(driver_seqs) - 1, -1, -1):
+                seq = driver_seqs[position]
+                tfs = [driver_tfs[position]]
+                for k, (seqs, frequencies) in enumerate(others):
+                    i = bisect_left(seqs, seq, 0, bounds[k])
+                    bounds[k] = i + 1 if i < len(seqs) and seqs[i] == seq else i
+                    if i == len(seqs) or seqs[i] != seq:
+                        break
+                    tfs.append(frequencies[i])
+                else:
+                    scored.append((bm25(idfs, tfs, self.lengths[seq], average_length), seq))
+                    if len(scored) >= SEARCH_MAX_CANDIDATES:
+                        truncated = position > 0
+                        break
+
+            # Ties go to the newer review
+            best = heapq.nlargest(limit, scored)
+            return [(seq, reviews[seq], round(score, 3)) for score, seq in best], truncated
+
+    def _scan_recent(self, terms, limit):
+        """search() over the newest SEARCH_SCAN_RECENT reviews, ranked with statistics of that window"""
+        with self.history.lock:
+            reviews = self.history.reviews
+            start = max(0, len(reviews) - SEARCH_SCAN_RECENT)
+            recent = reviews[start:]
+
+        matches, total_length = [], 0
+        document_frequency = dict.fromkeys(terms, 0)
+        for seq, review in enumerate(recent, start):
+            counts = review_counts(review)
+            length = sum(counts.values())
+            total_length += length
+            tfs = [min(counts.get(term, 0), 255) for term in terms]
+            for term, tf in zip(terms, tfs):
+                if tf:
+                    document_frequency[term] += 1
+            if all(tfs):
+                matches.append((seq, tfs, length))
+
+        average_length = total_length / len(recent) if recent else 1
+        idfs = [idf(len(recent), document_frequency[term]) for term in terms]
+        scored = [(bm25(idfs, tfs, length, average_length), seq) for seq, tfs, length in matches]
+        best = heapq.nlargest(limit, scored)
+        return [(seq, reviews[seq], round(score, 3)) for score, seq in best], start > 0
+
+    def status(self):
+        return {'reviews': len(self.lengths), 'terms': len(self.postings), 'ready': self.ready.is_set()}
@@ -0,0 +1,177 @@
+import atexit
+import json
+import os
+import threading
+import time
+from file_lock import file_lock
+from review_index import review_id
+from review_store import REVIEWS_STORE_FILE
+
+# Rollup snapshot kept next to the review store (empty = memory only)
+REVIEW_STATS_FILE = os.getenv("REVIEW_STATS_FILE", os.path.splitext(REVIEWS_STORE_FILE)[0] + ".stats.json")
+
+# Seconds between snapshot writes while new reviews are coming in
+REVIEW_STATS_FLUSH_INTERVAL = float(os.getenv("REVIEW_STATS_FLUSH_INTERVAL", "5"))
+
+# Review field -> rollup dimension
+DIMENSIONS = {
+    'business_name': 'by_business',
+    'star_rating': 'by_star_rating',
+    'language': 'by_language',
+    'use_case': 'by_use_case',
+}
+
+TOKEN_KINDS = ('prompt_tokens', 'completion_tokens', 'total_tokens')
+
+
+def new_bucket():
+    return {'reviews': 0, 'char_count': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}
+
+
+def bucket_summary(bucket):
+    """A rollup bucket with the average review length filled in"""
+    summary = dict(bucket)
+    summary['avg_char_count'] = round(bucket['char_count'] / bucket['reviews'], 1) if bucket['reviews'] else 0
+    return summary
+
+
+class ReviewStats:
+    """Counts and token spend per business, rating, language, use case and day, fed by HistoryCache
+
+    Every save updates a handful of counters, so reading the stats never scans
+    the history. The rollups are snapshotted next to the store together with the
+    number of reviews they cover; on start only reviews after that are counted.
+    """
+
+    def __init__(self, history, path=REVIEW_STATS_FILE):
+        self.history = history
+        self.path = path
+        self.lock = threading.Lock()
+        self.version = 0
+        self.cached = (None, None)  # (version, JSON text) of the last snapshot_json()
+        self.clear()
+        self.load()
+        history.subscribe(self)
+        if self.path:
+            threading.Thread(target=self._flush_loop, name="review-stats-flush", daemon=True).start()
+            atexit.register(self.save)
+
+    def clear(self):
+        with self.lock:
+            self.count = 0
+            self.last_id = None
+            self.skip = 0        # reviews already counted by the loaded snapshot
+            self.total = new_bucket()
+            self.rollups = {name: {} for name in list(DIMENSIONS.values()) + ['by_day']}
+            self.dirty = False
+            self.version += 1
+
+    def add(self, seq, review):
+        if seq < self.skip:
+            return
+
+        char_count = review.get('char_count')
+        if not isinstance(char_count, (int, float)):
+            char_count = len(review.get('review') or '')
+        usage = review.get('token_usage') or {}
+        tokens = [(kind, usage.get(kind)) for kind in TOKEN_KINDS if isinstance(usage.get(kind), (int, float))]
+
+        buckets = [self.total]
+        with self.lock:
+            for field, name in DIMENSIONS.items():
+                value = review.get(field)
+                if value is not None:
+                    buckets.append(self.rollups[name].setdefault(str(value), new_bucket()))
+            day = str(review.get('timestamp', ''))[:10]
+            if day:
+                buckets.append(self.rollups['by_day'].setdefault(day, new_bucket()))
+
+            for bucket in buckets:
+                bucket['reviews'] += 1
+                bucket['char_count'] += char_count
+                for kind, value in tokens:
+                    bucket[kind] += value
+
+            self.count = seq + 1
+            self.last_id = review_id(seq, review)
+            self.dirty = True
+            self.version += 1
+
+    def snapshot(self):
+        """Current rollups; cost depends on the number of keys, not reviews"""
+        self.history.refresh()
+        with self.lock:
+            stats = {'total': bucket_summary(self.total)}
+            for name, buckets in self.rollups.items():
+                stats[name] = {key: bucket_summary(bucket) for key, bucket in sorted(buckets.items())}
+        return stats
+
+    def snapshot_json(self):
+        """snapshot() as a JSON object, re-encoded only after new reviews arrived"""
+        self.history.refresh()
+        version, text = self.cached
+        if version != self.version:
+            version = self.version
+            text = json.dumps({'success': True, **self.snapshot()}, ensure_ascii=False)
+            self.cached = (version, text)
+        return text
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(REVIEW_STATS_FLUSH_INTERVAL)
+            if self.dirty:
+                self.save()
+
+    def save(self):
+        """Atomically write the rollups unless another worker already saved newer ones"""
+        if not self.path:
+            return
+        with self.lock:
+            data = json.dumps({'count': self.count, 'last_id': self.last_id,
+                               'total': self.total, 'rollups': self.rollups}, ensure_ascii=False)
+            count = self.count
+            self.dirty = False
+        try:
+            with file_lock(self.path + ".lock"):
+                saved = self._read()
+                if saved and saved.get('count', 0) > count:
+                    return
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️ Could not save review stats: {e}")
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def load(self):
+        """Restore the last snapshot if it still matches the start of the store"""
+        if not self.path:
+            return
+        with file_lock(self.path + ".lock"):
+            saved = self._read()
+        if not saved or not saved.get('count'):
+            return
+
+        # The store may have been replaced or truncated since the snapshot
+        count = saved['count']
+        review = self.history.get(count - 1)
+        if review is None or review_id(count - 1, review) != saved.get('last_id'):
+            print("⚠️ Review stats snapshot does not match the store, recounting")
+            return
+
+        with self.lock:
+            self.count = self.skip = count
+            self.last_id = saved['last_id']
+            self.total = saved['total']
+            for name in self.rollups:
+                self.rollups[name] = saved['rollups'].get(name, {})
+            self.version += 1
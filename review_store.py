@@ -0,0 +1,116 @@
+import json
+import os
+import uuid
+from file_lock import file_lock
+
+# Append-only JSON Lines store (one review per line)
+REVIEWS_STORE_FILE = os.getenv("REVIEWS_STORE_FILE", "reviews_history.jsonl")
+
+# Old whole-file JSON array, imported once into the JSONL store
+LEGACY_REVIEWS_FILE = "reviews_history.json"
+
+
+def new_review_id():
+    """Create a stable id for a review at save time"""
+    return uuid.uuid4().hex
+
+
+def encode_review(review_data):
+    """Serialize one review as a single JSON line"""
+    return json.dumps(review_data, ensure_ascii=False, separators=(',', ':')) + "\n"
+
+
+class ReviewStore:
+    """Append-only review store that is safe to share between gunicorn workers"""
+
+    def __init__(self, path=REVIEWS_STORE_FILE, legacy_path=LEGACY_REVIEWS_FILE):
+        self.path = path
+        self.legacy_path = legacy_path
+        self.lock_path = path + ".lock"
+        self.migrate_legacy()
+
+    def migrate_legacy(self):
+        """One-time import of the legacy JSON array file into the JSONL store"""
+        if os.path.exists(self.path):
+            return
+        if not self.legacy_path or not os.path.exists(self.legacy_path):
+            return
+
+        with file_lock(self.lock_path):
+            # Another worker may have finished the migration while we waited
+            if os.path.exists(self.path):
+                return
+
+            try:
+                with open(self.legacy_path, 'r', encoding='utf-8') as f:
+                    reviews = json.load(f)
+                if not isinstance(reviews, list):
+                    raise ValueError("expected a JSON array of reviews")
+            except ValueError as e:
+                # Keep the unreadable history for manual recovery instead of
+                # importing nothing and never looking at it again
+                corrupt_path = self.legacy_path + ".corrupt"
+                os.replace(self.legacy_path, corrupt_path)
+                print(f"⚠️ Could not import {self.legacy_path} ({e}); moved it to {corrupt_path}")
+                return
+
+            # Write to a temp file first so a crash never leaves a half-migrated store
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for review in reviews:
+                    f.write(encode_review(review))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+    def append(self, review_data):
+        """Append one review in O(1); returns the (start, end) byte offsets written"""
+        return self.append_many([review_data])
+
+    def append_many(self, reviews):
+        """Append several reviews with a single locked write"""
+        data = "".join(encode_review(review) for review in reviews).encode('utf-8')
+
+        with file_lock(self.lock_path):
+            with open(self.path, 'a+b') as f:
+                f.seek(0, os.SEEK_END)
+                start = f.tell()
+
+                # A crash mid-write can leave a torn last line; start on a fresh one
+                if start > 0:
+                    f.seek(start - 1)
+                    if f.read(1) != b"\n":
+                        data = b"\n" + data
+
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+                end = f.tell()
+
+        return start, end
+
+    def iter_from(self, offset=0):
+        """Yield (end_offset, review) for every complete line after offset"""
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                # A line without a newline is still being written by another worker
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    review = json.loads(line)
+                except ValueError:
+                    # Skip lines torn by a crash
+                    continue
+                yield offset, review
+
+    def load_all(self):
+        """Load every stored review, oldest first"""
+        return [review for _, review in self.iter_from(0)]
@@ -0,0 +1,382 @@
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from rate_limiter import get_rate_limiter, estimate_tokens, RateLimitExceeded, SARVAM_RATE_MAX_WAIT
+from metrics import (
+    RATE_LIMIT_WAIT_SECONDS, UPSTREAM_SECONDS, record_response, record_failure, record_usage
+)
+
+# Connection pool and retry settings for Sarvam AI calls
+SARVAM_POOL_SIZE = int(os.getenv("SARVAM_POOL_SIZE", "10"))
+SARVAM_MAX_RETRIES = int(os.getenv("SARVAM_MAX_RETRIES", "3"))
+SARVAM_BACKOFF_FACTOR = float(os.getenv("SARVAM_BACKOFF_FACTOR", "0.5"))
+SARVAM_BACKOFF_JITTER = float(os.getenv("SARVAM_BACKOFF_JITTER", "0.5"))
+
+# Longest Retry-After we wait out; a 429 asking for more is returned as-is
+SARVAM_RETRY_AFTER_MAX = float(os.getenv("SARVAM_RETRY_AFTER_MAX", str(SARVAM_RATE_MAX_WAIT)))
+
+# Connections the async session (ASGI path) keeps open to Sarvam AI
+SARVAM_ASYNC_MAX_CONNECTIONS = int(os.getenv("SARVAM_ASYNC_MAX_CONNECTIONS", "200"))
+
+# Rate limited or transient server errors are worth another try
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def build_retry(max_retries=SARVAM_MAX_RETRIES, backoff_factor=SARVAM_BACKOFF_FACTOR,
+                backoff_jitter=SARVAM_BACKOFF_JITTER):
+    """Exponential backoff with jitter for connection errors only
+
+    429/5xx replies are retried by send_with_retries(), which charges every
+    attempt against the rate limiter; urllib3 would re-send behind its back.
+    """
+    options = dict(
+        total=max_retries,
+        connect=max_retries,
+        read=0,  # a read timeout may mean the completion is still running; don't pay for it twice
+        status=0,
+        status_forcelist=(),
+        allowed_methods=frozenset(['POST']),
+        backoff_factor=backoff_factor,
+        raise_on_status=False,
+    )
+    try:
+        return Retry(backoff_jitter=backoff_jitter, **options)
+    except TypeError:
+        # urllib3 < 2 has no jitter support
+        return Retry(**options)
+
+
+def build_session(pool_size=SARVAM_POOL_SIZE, retry=None):
+    """Create a keep-alive session with a bounded connection pool"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=retry or build_retry(),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Return the process-wide pooled session (rebuilt after a fork)"""
+    global _session, _session_pid
+    if _session is not None and _session_pid == os.getpid():
+        return _session
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            _session = build_session()
+            _session_pid = os.getpid()
+        return _session
+
+
+def wait_for_budget(limiter, estimated):
+    """limiter.acquire() with the wait time and give-ups recorded"""
+    try:
+        with RATE_LIMIT_WAIT_SECONDS.time():
+            limiter.acquire(estimated)
+    except RateLimitExceeded:
+        record_failure('rate_limited')
+        raise
+
+
+def send_with_retries(limiter, estimated, send):
+    """Call send() once budget is available; 429/5xx replies are retried with backoff
+
+    Every attempt waits for (and spends) rate limit budget, so retries are
+    never sent behind the limiter's back.
+    """
+    for attempt in range(SARVAM_MAX_RETRIES + 1):
+        wait_for_budget(limiter, estimated)
+        response = send()
+        if response.status_code not in RETRY_STATUSES or attempt == SARVAM_MAX_RETRIES:
+            return response
+        delay = retry_delay(attempt, response.headers.get('Retry-After'))
+        if delay > SARVAM_RETRY_AFTER_MAX:
+            return response
+        record_response(response.status_code)
+        response.close()
+        time.sleep(delay)
+
+
+def post_chat_completion(endpoint, api_key, payload, timeout=30):
+    """POST a chat-completions payload over the pooled session
+
+    Waits for client-side rate limit budget first (may raise RateLimitExceeded)
+    and settles the token bucket with the usage the API reports.
+    """
+    headers = {
+        "api-subscription-key": api_key,
+        "Content-Type": "application/json"
+    }
+    limiter = get_rate_limiter()
+    estimated = estimate_tokens(payload)
+
+    def send():
+        with UPSTREAM_SECONDS.time(mode='sync'):
+            return get_session().post(endpoint, headers=headers, json=payload, timeout=timeout)
+
+    try:
+        response = send_with_retries(limiter, estimated, send)
+    except requests.exceptions.Timeout:
+        record_failure('timeout')
+        raise
+    except requests.exceptions.RequestException:
+        record_failure('connection_error')
+        raise
+    record_response(response.status_code)
+    if response.status_code == 200:
+        try:
+            usage = response.json().get('usage')
+        except ValueError:
+            usage = None
+        record_usage(usage)
+        limiter.reconcile(estimated, usage)
+    return response
+
+
+def sse_data(line):
+    """Payload of an event-stream `data:` line, or None for any other line"""
+    if isinstance(line, bytes):
+        line = line.decode('utf-8')
+    if not line.startswith("data:"):
+        return None
+    return line[5:].strip()
+
+
+def iter_sse_data(lines):
+    """Parsed JSON of each `data:` line of an OpenAI-style event stream, until [DONE]"""
+    for line in lines:
+        data = sse_data(line)
+        if data is None:
+            continue
+        if data == "[DONE]":
+            return
+        yield json.loads(data)
+
+
+def stream_chat_completion(endpoint, api_key, payload, timeout=30):
+    """POST a streaming chat-completions request; returns (response, chunks)
+
+    chunks yields the parsed stream chunks (empty unless the status is 200)
+    and settles the token bucket with the usage sent on the final chunk.
+    """
+    headers = {
+        "api-subscription-key": api_key,
+        "Content-Type": "application/json"
+    }
+    payload = dict(payload, stream=True)
+    limiter = get_rate_limiter()
+    estimated = estimate_tokens(payload)
+
+    def send():
+        # Time to response headers; tokens keep arriving after this
+        with UPSTREAM_SECONDS.time(mode='stream'):
+            return get_session().post(endpoint, headers=headers, json=payload, timeout=timeout, stream=True)
+
+    try:
+        response = send_with_retries(limiter, estimated, send)
+    except requests.exceptions.Timeout:
+        record_failure('timeout')
+        raise
+    except requests.exceptions.RequestException:
+        record_failure('connection_error')
+        raise
+    record_response(response.status_code)
+
+    def chunks():
+        if response.status_code != 200:
+            return
+        try:
+            for chunk in iter_sse_data(response.iter_lines()):
+                if chunk.get('usage'):
+                    record_usage(chunk['usage'])
+                    limiter.reconcile(estimated, chunk['usage'])
+                yield chunk
+        finally:
+            response.close()
+
+    return response, chunks()
+
+
+class AsyncResponse:
+    """The parts of a requests.Response the generator reads, for aiohttp replies"""
+
+    def __init__(self, status_code, text, headers):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers
+
+    def json(self):
+        return json.loads(self.text)
+
+
+_async_session = None
+
+
+def get_async_session():
+    """Return the process-wide aiohttp session (uvicorn runs one event loop per process)"""
+    global _async_session
+    if _async_session is None or _async_session.closed:
+        _async_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=SARVAM_ASYNC_MAX_CONNECTIONS)
+        )
+    return _async_session
+
+
+async def close_async_session():
+    global _async_session
+    if _async_session is not None:
+        await _async_session.close()
+        _async_session = None
+
+
+def retry_delay(attempt, retry_after=None):
+    """Seconds before retry number `attempt` (0-based), same policy as build_retry()
+
+    A server Retry-After wins; callers give up instead of retrying when it is
+    longer than SARVAM_RETRY_AFTER_MAX.
+    """
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+    return SARVAM_BACKOFF_FACTOR * (2 ** attempt) + random.uniform(0, SARVAM_BACKOFF_JITTER)
+
+
+async def wait_for_budget_async(limiter, estimated):
+    """wait_for_budget() for the event loop"""
+    try:
+        with RATE_LIMIT_WAIT_SECONDS.time():
+            await limiter.acquire_async(estimated)
+    except RateLimitExceeded:
+        record_failure('rate_limited')
+        raise
+
+
+async def async_post_chat_completion(endpoint, api_key, payload, timeout=30):
+    """Non-blocking post_chat_completion() for the ASGI path
+
+    Retries connection errors and 429/5xx like the pooled requests session,
+    charging every attempt against the rate limiter; timeouts are not retried.
+    """
+    headers = {
+        "api-subscription-key": api_key,
+        "Content-Type": "application/json"
+    }
+    limiter = get_rate_limiter()
+    estimated = estimate_tokens(payload)
+
+    session = get_async_session()
+    try:
+        response, _ = await _post_with_retries(session, limiter, estimated, endpoint, headers, payload, timeout)
+    except asyncio.TimeoutError:
+        record_failure('timeout')
+        raise
+    except aiohttp.ClientError:
+        record_failure('connection_error')
+        raise
+    record_response(response.status_code)
+
+    if response.status_code == 200:
+        try:
+            usage = response.json().get('usage')
+        except ValueError:
+            usage = None
+        record_usage(usage)
+        await limiter.reconcile_async(estimated, usage)
+    return response
+
+
+async def async_stream_chat_completion(endpoint, api_key, payload, timeout=30):
+    """Non-blocking stream_chat_completion() for the ASGI path; returns (response, chunks)
+
+    chunks is an async iterator of the parsed stream chunks (empty unless the
+    status is 200); `timeout` applies per read, not to the whole stream.
+    """
+    headers = {
+        "api-subscription-key": api_key,
+        "Content-Type": "application/json"
+    }
+    payload = dict(payload, stream=True)
+    limiter = get_rate_limiter()
+    estimated = estimate_tokens(payload)
+
+    session = get_async_session()
+    try:
+        response, reply = await _post_with_retries(session, limiter, estimated, endpoint, headers, payload,
+                                                   timeout, stream=True)
+    except asyncio.TimeoutError:
+        record_failure('timeout')
+        raise
+    except aiohttp.ClientError:
+        record_failure('connection_error')
+        raise
+    record_response(response.status_code)
+
+    async def chunks():
+        if reply is None:
+            return
+        try:
+            async for line in reply.content:
+                data = sse_data(line)
+                if data is None:
+                    continue
+                if data == "[DONE]":
+                    return
+                chunk = json.loads(data)
+                if chunk.get('usage'):
+                    record_usage(chunk['usage'])
+                    await limiter.reconcile_async(estimated, chunk['usage'])
+                yield chunk
+        finally:
+            reply.release()
+
+    return response, chunks()
+
+
+async def _post_with_retries(session, limiter, estimated, endpoint, headers, payload, timeout, stream=False):
+    """POST with budget taken per attempt; returns (AsyncResponse, open reply or None)
+
+    With stream=True a 200 reply is handed back unread and the caller must
+    release() it; every other reply is read into the AsyncResponse.
+    """
+    if stream:
+        client_timeout = aiohttp.ClientTimeout(total=None, sock_connect=timeout, sock_read=timeout)
+    else:
+        client_timeout = aiohttp.ClientTimeout(total=timeout)
+    for attempt in range(SARVAM_MAX_RETRIES + 1):
+        await wait_for_budget_async(limiter, estimated)
+        try:
+            with UPSTREAM_SECONDS.time(mode='async_stream' if stream else 'async'):
+                reply = await session.post(endpoint, headers=headers, json=payload, timeout=client_timeout)
+                if stream and reply.status == 200:
+                    return AsyncResponse(reply.status, "", reply.headers), reply
+                async with reply:
+                    response = AsyncResponse(reply.status, await reply.text(), reply.headers)
+        except aiohttp.ClientConnectorError:
+            if attempt == SARVAM_MAX_RETRIES:
+                raise
+            await asyncio.sleep(retry_delay(attempt))
+            continue
+        if response.status_code in RETRY_STATUSES and attempt < SARVAM_MAX_RETRIES:
+            delay = retry_delay(attempt, response.headers.get('Retry-After'))
+            if delay <= SARVAM_RETRY_AFTER_MAX:
+                record_response(response.status_code)
+                await asyncio.sleep(delay)
+                continue
+        return response, None
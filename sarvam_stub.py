@@ -0,0 +1,180 @@
+"""
+Local stand-in for the Sarvam AI chat-completions endpoint.
+
+Run it and point the generator at it:
+    python sarvam_stub.py --port 8765 --latency 0.5 --error-rate 0.1
+    SARVAM_API_ENDPOINT=http://127.0.0.1:8765/v1/chat/completions python app.py
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SAMPLE_SENTENCES = [
+    "I went in with low hopes but the staff listened well and took care of everything.",
+    "The place was clean and the people there were friendly from start to end.",
+    "My friend told me about it and I am glad I gave it a try.",
+    "They explained each step clearly so I never felt lost.",
+    "Waiting time was short and the whole visit felt easy.",
+    "I liked how calm the place felt even on a busy day.",
+]
+
+
+class StubConfig:
+    """Behaviour knobs for the stub server"""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503,
+                 retry_after=None, response_chars=250, token_interval=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.response_chars = response_chars
+        self.token_interval = token_interval
+        self.requests = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+
+
+def make_review_text(business_name, chars):
+    """Build review-like filler text of roughly `chars` characters"""
+    text = f"My visit to {business_name} went well."
+    while len(text) < chars:
+        text += " " + random.choice(SAMPLE_SENTENCES)
+    return text[:chars].rsplit(' ', 1)[0] + "."
+
+
+def make_handler(config):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out in separate writes; don't let Nagle hold the body back
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, body, headers=None):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+
+            with config.lock:
+                config.requests += 1
+                failing = random.random() < config.error_rate
+                if failing:
+                    config.errors += 1
+
+            delay = config.latency + random.uniform(0, config.jitter)
+            if delay:
+                time.sleep(delay)
+
+            if failing:
+                headers = {}
+                if config.retry_after is not None:
+                    headers["Retry-After"] = str(config.retry_after)
+                self._send_json(config.error_status, {"error": "stub failure"}, headers)
+                return
+
+            prompt = payload.get("messages", [{}])[-1].get("content", "")
+            business_name = prompt.split('called "', 1)[-1].split('"', 1)[0] if 'called "' in prompt else "this place"
+            # Like the real model, stop at max_tokens (about 4 characters each)
+            chars = min(config.response_chars, payload.get("max_tokens", 10 ** 6) * 4)
+            texts = [make_review_text(business_name, chars) for _ in range(payload.get("n", 1))]
+            completion_chars = sum(len(text) for text in texts)
+            usage = {
+                "prompt_tokens": len(prompt) // 4,
+                "completion_tokens": completion_chars // 4,
+                "total_tokens": (len(prompt) + completion_chars) // 4
+            }
+            if payload.get("stream"):
+                self._send_stream(texts[0], usage)
+                return
+            self._send_json(200, {
+                "choices": [{"index": i, "message": {"role": "assistant", "content": text}}
+                            for i, text in enumerate(texts)],
+                "usage": usage
+            })
+
+        def _send_stream(self, text, usage):
+            """OpenAI-style SSE chunks, one word at a time, usage on the last chunk"""
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            words = text.split(" ")
+            for i, word in enumerate(words):
+                delta = word if i == 0 else " " + word
+                chunk = {"choices": [{"index": 0, "delta": {"content": delta}, "finish_reason": None}]}
+                if i == len(words) - 1:
+                    chunk["choices"][0]["finish_reason"] = "stop"
+                    chunk["usage"] = usage
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+                self.wfile.flush()
+                if config.token_interval:
+                    time.sleep(config.token_interval)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+
+    return StubHandler
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Load tests open hundreds of connections at once
+    request_queue_size = 1024
+
+
+def start_stub(port=0, **options):
+    """Start the stub in a background thread; returns (server, endpoint_url, config)"""
+    config = StubConfig(**options)
+    server = StubServer(("127.0.0.1", port), make_handler(config))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+    return server, endpoint, config
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Sarvam AI chat-completions stub")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency, up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--retry-after", type=int, default=None, help="Retry-After seconds sent with failures")
+    parser.add_argument("--response-chars", type=int, default=250)
+    parser.add_argument("--token-interval", type=float, default=0.0, help="seconds between streamed words")
+    args = parser.parse_args()
+
+    server, endpoint, _ = start_stub(
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        retry_after=args.retry_after,
+        response_chars=args.response_chars,
+        token_interval=args.token_interval,
+    )
+    print(f"🧪 Sarvam stub listening on {endpoint} (CTRL+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
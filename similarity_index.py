@@ -0,0 +1,192 @@
+import os
+import re
+import threading
+import zlib
+from history_cache import get_history_cache
+
+# MinHash signature = BANDS x ROWS bins; reviews sharing any band are candidates
+SIMILARITY_BANDS = 8
+SIMILARITY_ROWS = 4
+SIGNATURE_SIZE = SIMILARITY_BANDS * SIMILARITY_ROWS  # power of two
+SHINGLE_WORDS = 3
+
+# Jaccard similarity (over word shingles) at which a review counts as a near-duplicate
+SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.5"))
+
+# Only the newest entries of a crowded bucket are compared exactly
+MAX_CANDIDATES_PER_BUCKET = 50
+
+# While the index is still being built after start, texts are compared with this many newest reviews
+SIMILARITY_SCAN_RECENT = int(os.getenv("SIMILARITY_SCAN_RECENT", "2000"))
+
+_BIN_BITS = SIGNATURE_SIZE.bit_length() - 1
+_WORD_RE = re.compile(r"\w+")
+
+
+def shingles(text):
+    """Hashed word 3-grams of a review (whole text for very short ones)"""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < SHINGLE_WORDS:
+        return {zlib.crc32(" ".join(words).encode('utf-8'))} if words else set()
+    return {
+        zlib.crc32(" ".join(words[i:i + SHINGLE_WORDS]).encode('utf-8'))
+        for i in range(len(words) - SHINGLE_WORDS + 1)
+    }
+
+
+def minhash(hashes):
+    """One-permutation MinHash: one hash per shingle, minimum per bin
+
+    Costs O(shingles) instead of O(shingles x permutations). Empty bins borrow
+    the next non-empty bin's value (rotation densification) so short reviews
+    still get a full signature.
+    """
+    signature = [None] * SIGNATURE_SIZE
+    for h in hashes:
+        # Scramble crc32 (multiplicative hashing) before splitting it into bin + value
+        h = (h * 0x9E3779B1) & 0xFFFFFFFF
+        bin_index, value = h & (SIGNATURE_SIZE - 1), h >> _BIN_BITS
+        current = signature[bin_index]
+        if current is None or value < current:
+            signature[bin_index] = value
+
+    if None in signature:
+        filled = [i for i, value in enumerate(signature) if value is not None]
+        if not filled:
+            return signature
+        for i in range(SIGNATURE_SIZE):
+            if signature[i] is None:
+                # Distance to the next filled bin keeps borrowed values distinct per bin
+                nxt = next((j for j in filled if j > i), filled[0] + SIGNATURE_SIZE)
+                signature[i] = (signature[nxt % SIGNATURE_SIZE] << 6) | (nxt - i)
+    return signature
+
+
+def band_keys(signature):
+    """One bucket key per LSH band"""
+    return [
+        (band, hash(tuple(signature[band * SIMILARITY_ROWS:(band + 1) * SIMILARITY_ROWS])))
+        for band in range(SIMILARITY_BANDS)
+    ]
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class SimilarityIndex:
+    """MinHash + LSH near-duplicate index over the review history, fed by HistoryCache
+
+    The history is indexed in the background so a worker boots without waiting
+    for it; until then score() compares against the newest reviews directly.
+    """
+
+    def __init__(self, history):
+        self.history = history
+        self.lock = threading.Lock()
+        self.clear()
+        self.ready = history.subscribe(self, background=True)
+
+    def clear(self):
+        self.buckets = {}
+
+    def add(self, seq, review):
+        hashes = shingles(review.get('review') or '')
+        if not hashes:
+            return
+        keys = band_keys(minhash(hashes))
+        with self.lock:
+            for key in keys:
+                self.buckets.setdefault(key, []).append(seq)
+
+    def score(self, text):
+        """Return (similarity 0..1, seq of the closest earlier review or None)"""
+        hashes = shingles(text)
+        if not hashes:
+            return 0.0, None
+        if not self.ready.is_set():
+            return self._scan_recent(hashes)
+
+        self.history.refresh()
+        candidates = set()
+        with self.lock:
+            for key in band_keys(minhash(hashes)):
+                bucket = self.buckets.get(key)
+                if bucket:
+                    candidates.update(bucket[-MAX_CANDIDATES_PER_BUCKET:])
+
+        # Exact Jaccard on the handful of LSH candidates
+        best, best_seq = 0.0, None
+        for seq in candidates:
+            review = self.history.get(seq)
+            if review is None:
+                continue
+            similarity = jaccard(hashes, shingles(review.get('review') or ''))
+            if similarity > best:
+                best, best_seq = similarity, seq
+        return best, best_seq
+
+    def _scan_recent(self, hashes):
+        """score() against the newest SIMILARITY_SCAN_RECENT reviews, exactly"""
+        self.history.refresh()
+        with self.history.lock:
+            reviews = self.history.reviews
+            start = max(0, len(reviews) - SIMILARITY_SCAN_RECENT)
+            recent = reviews[start:]
+        best, best_seq = 0.0, None
+        for seq, review in enumerate(recent, start):
+            similarity = jaccard(hashes, shingles(review.get('review') or ''))
+            if similarity > best:
+                best, best_seq = similarity, seq
+        return best, best_seq
+
+    def is_duplicate(self, text, threshold=SIMILARITY_THRESHOLD):
+        """True if text is a near-duplicate of any stored review"""
+        return self.score(text)[0] >= threshold
+
+
+class SiblingSet:
+    """Near-duplicate check among reviews not saved yet, e.g. the results of one batch
+
+    Same MinHash + LSH scheme as SimilarityIndex, kept in memory for the set's lifetime.
+    Not thread-safe; used from the single thread that collects the results.
+    """
+
+    def __init__(self):
+        self.buckets = {}
+        self.hashes = []
+
+    def score(self, text):
+        """Highest Jaccard similarity of text to any review added so far"""
+        hashes = shingles(text)
+        if not hashes:
+            return 0.0
+        candidates = set()
+        for key in band_keys(minhash(hashes)):
+            candidates.update(self.buckets.get(key, ())[-MAX_CANDIDATES_PER_BUCKET:])
+        return max((jaccard(hashes, self.hashes[i]) for i in candidates), default=0.0)
+
+    def add(self, text):
+        hashes = shingles(text)
+        if not hashes:
+            return
+        self.hashes.append(hashes)
+        for key in band_keys(minhash(hashes)):
+            self.buckets.setdefault(key, []).append(len(self.hashes) - 1)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_similarity_index(history=None):
+    """Return the process-wide similarity index for a history cache"""
+    history = history or get_history_cache()
+    with _indexes_lock:
+        index = _indexes.get(id(history))
+        if index is None:
+            index = SimilarityIndex(history)
+            _indexes[id(history)] = index
+        return index